@@ -0,0 +1,242 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from graph_generator import DistanceMatrix
+from instance_loader import load_instance
+from local_search import LocalSearch
+from operators import CROSSOVERS, MUTATIONS
+from solver import TSPGeneticSolver
+
+# Velikosti náhodně generovaných instancí a výchozí seed, aby byly běhy porovnatelné
+BENCHMARK_SIZES = (50, 200, 1000, 5000)
+DEFAULT_SEED = 12345
+
+# V jakých podílech doby běhu se vypisuje nejlepší dosažený gap (průběh kvality v čase)
+GAP_CHECKPOINTS = (0.25, 0.5, 1.0)
+
+DEFAULT_OUTPUT = "benchmark_results.json"
+DEFAULT_BASELINE = "benchmark_baseline.json"
+
+
+def reference_length(distance_matrix):
+    """
+    Referenční délka cesty instance: 2-opt/Or-opt optimum z cesty 0, 1, ..., n-1.
+    Je deterministická, takže se dá porovnávat mezi běhy.
+    """
+    local_search = LocalSearch(distance_matrix)
+    _, length, _ = local_search.improve(np.arange(distance_matrix.number_of_cities))
+    return float(length)
+
+
+def _peak_memory_mb():
+    """Špičková paměť (RSS) aktuálního procesu v MB, nebo None pokud ji systém neposkytuje."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux vrací kB, macOS bajty
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(case, config):
+    """
+    Spustí jeden benchmark (volá se v samostatném procesu, aby měla špičková paměť smysl).
+
+    Args:
+        case (dict): Popis instance - {"name", "cities"} pro generovanou, nebo {"name", "path"} pro soubor;
+                     volitelně "reference" s referenční délkou cesty.
+        config (dict): Parametry solveru a měření (population_size, n_generations, mutation_rate,
+                       crossover, mutation, seed, target_gap - None = čas do cíle se neměří).
+
+    Returns:
+        dict: Naměřené hodnoty.
+    """
+    seed = config["seed"]
+    if "path" in case:
+        distance_matrix = load_instance(case["path"])
+    else:
+        np.random.seed(seed)
+        distance_matrix = DistanceMatrix(number_of_cities=case["cities"])
+    reference = case.get("reference") or reference_length(distance_matrix)
+    target = reference * (1.0 + config["target_gap"]) if config["target_gap"] is not None else None
+
+    time_to_target = None
+    generations_done = 0
+    gap_trace = []  # [čas, gap] při každém zlepšení nejlepší cesty
+
+    def record(generation, best_distance, best_route):
+        nonlocal time_to_target, generations_done
+        generations_done = generation
+        elapsed = time.perf_counter() - start
+        gap = (best_distance - reference) / reference
+        if not gap_trace or gap < gap_trace[-1][1]:
+            gap_trace.append([elapsed, gap])
+        if target is not None and time_to_target is None and best_distance <= target:
+            time_to_target = elapsed
+
+    random.seed(seed)
+    np.random.seed(seed)
+    solver = TSPGeneticSolver(distance_matrix, population_size=config["population_size"],
+                              mutation_rate=config["mutation_rate"], n_generations=config["n_generations"],
+                              crossover=config["crossover"], mutation=config["mutation"],
+                              verbose=False, progress_callback=record)
+    start = time.perf_counter()
+    _, best_distance = solver.solve()
+    wall_time = time.perf_counter() - start
+
+    return {
+        "name": case["name"],
+        "n_cities": distance_matrix.number_of_cities,
+        "generations": generations_done,
+        "wall_time": wall_time,
+        "generations_per_second": generations_done / wall_time if wall_time > 0 else None,
+        "reference_length": reference,
+        "best_distance": best_distance,
+        "final_gap": (best_distance - reference) / reference,
+        "target_gap": config["target_gap"],
+        "time_to_target": time_to_target,
+        "gap_trace": gap_trace,
+        "peak_memory_mb": _peak_memory_mb(),
+        "stats": solver.get_stats(),
+    }
+
+
+def best_gap_at(gap_trace, elapsed):
+    """Vrátí nejlepší gap dosažený do času 'elapsed' (podle gap_trace z run_case), nebo None."""
+    gaps = [gap for time_point, gap in gap_trace if time_point <= elapsed]
+    return gaps[-1] if gaps else None
+
+
+def compare_to_baseline(results, baseline, speed_tolerance=0.2, gap_tolerance=0.02):
+    """
+    Porovná výsledky s uloženou baseline.
+
+    Args:
+        results (list): Výsledky aktuálního běhu (výstup run_case).
+        baseline (list): Výsledky uložené baseline.
+        speed_tolerance (float): Povolený relativní pokles generací za sekundu.
+        gap_tolerance (float): Povolené absolutní zhoršení finálního gapu.
+
+    Returns:
+        list: Popisy regresí (prázdný seznam = bez regresí).
+    """
+    baseline_by_name = {entry["name"]: entry for entry in baseline}
+    regressions = []
+    for result in results:
+        previous = baseline_by_name.get(result["name"])
+        if previous is None:
+            continue
+        old_speed, new_speed = previous["generations_per_second"], result["generations_per_second"]
+        if old_speed and new_speed is not None and new_speed < old_speed * (1.0 - speed_tolerance):
+            regressions.append(f"{result['name']}: rychlost klesla z {old_speed:.2f} na {new_speed:.2f} generací/s")
+        if result["final_gap"] > previous["final_gap"] + gap_tolerance:
+            regressions.append(f"{result['name']}: gap se zhoršil z {previous['final_gap']:.2%} "
+                               f"na {result['final_gap']:.2%}")
+    return regressions
+
+
+def _parse_instance_argument(value):
+    """Převede argument 'cesta[=referenční_délka]' na popis instance."""
+    path, _, reference = value.partition("=")
+    case = {"name": os.path.basename(path), "path": path}
+    if reference:
+        case["reference"] = float(reference)
+    return case
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark propustnosti a kvality TSPGeneticSolveru.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(BENCHMARK_SIZES),
+                        help="Počty měst generovaných instancí.")
+    parser.add_argument("--instance", action="append", default=[], type=_parse_instance_argument,
+                        help="Soubor instance (.tsp/.csv), volitelně s referenční délkou: cesta=délka.")
+    parser.add_argument("--generations", type=int, default=100)
+    parser.add_argument("--population", type=int, default=100)
+    parser.add_argument("--mutation-rate", type=float, default=0.1)
+    parser.add_argument("--crossover", choices=sorted(CROSSOVERS), default="ox")
+    parser.add_argument("--mutation", choices=sorted(MUTATIONS), default="swap")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--target-gap", type=float, default=None,
+                        help="Měří se i čas do dosažení délky reference * (1 + target_gap). "
+                             "Průběh nejlepšího gapu v čase se vypisuje vždy.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Uloží výsledky jako novou baseline.")
+    parser.add_argument("--allow-missing-baseline", action="store_true",
+                        help="Chybějící baseline není chyba (jinak skončí nenulovým kódem).")
+    parser.add_argument("--speed-tolerance", type=float, default=0.2)
+    parser.add_argument("--gap-tolerance", type=float, default=0.02)
+    args = parser.parse_args(argv)
+
+    config = {
+        "population_size": args.population,
+        "n_generations": args.generations,
+        "mutation_rate": args.mutation_rate,
+        "crossover": args.crossover,
+        "mutation": args.mutation,
+        "seed": args.seed,
+        "target_gap": args.target_gap,
+    }
+    cases = [{"name": f"random-{n}", "cities": n} for n in args.sizes] + args.instance
+
+    results = []
+    for case in cases:
+        # Každá instance v čerstvém procesu - špičková paměť se neslévá mezi instancemi
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as executor:
+            result = executor.submit(run_case, case, config).result()
+        results.append(result)
+        gaps_over_time = " / ".join(
+            f"{gap:.2%}" if gap is not None else "-"
+            for gap in (best_gap_at(result["gap_trace"], share * result["wall_time"]) for share in GAP_CHECKPOINTS))
+        line = (f"{result['name']}: {result['generations_per_second']:.2f} generací/s, "
+                f"gap {result['final_gap']:.2%} (v {' / '.join(f'{share:.0%}' for share in GAP_CHECKPOINTS)} "
+                f"času: {gaps_over_time}), ")
+        if args.target_gap is not None:
+            time_to_target = (f"{result['time_to_target']:.2f} s" if result["time_to_target"] is not None
+                              else "nedosaženo")
+            line += f"čas do cíle {time_to_target}, "
+        print(line + f"paměť {result['peak_memory_mb'] or 0:.0f} MB")
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump({"config": config, "results": results}, file, indent=2)
+    print(f"Výsledky uloženy do {args.output}.")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump({"config": config, "results": results}, file, indent=2)
+        print(f"Baseline uložena do {args.baseline}.")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        if args.allow_missing_baseline:
+            print(f"Baseline {args.baseline} neexistuje, porovnání se přeskakuje (vytvořte ji přes --save-baseline).")
+            return 0
+        print(f"CHYBA: baseline {args.baseline} neexistuje (vytvořte ji přes --save-baseline, "
+              f"nebo použijte --allow-missing-baseline).")
+        return 2
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    if baseline["config"] != config:
+        print("CHYBA: baseline byla naměřena s jinými parametry, výsledky nelze porovnat.")
+        return 2
+    regressions = compare_to_baseline(results, baseline["results"], args.speed_tolerance, args.gap_tolerance)
+    if regressions:
+        print("REGRESE oproti baseline:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    print("Bez regresí oproti baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import json
+import os
+import random
+
+import numpy as np
+
+# Verze formátu checkpointu; při nekompatibilní změně se zvýší
+CHECKPOINT_VERSION = 1
+
+
+def save_checkpoint(path, population, distances, best_route, best_distance, generation, last_improvement,
+                    mutation_rate, locally_optimal_keys=()):
+    """
+    Uloží stav běhu genetického algoritmu do komprimovaného souboru .npz.
+
+    Kromě populace a délek jejích cest se ukládá i stav generátorů náhodných čísel
+    (random i np.random), takže pokračování z checkpointu projde stejnou trajektorií
+    jako nepřerušený běh. Soubor se zapisuje přes dočasný soubor a přejmenování,
+    takže přerušení během zápisu nepoškodí předchozí checkpoint.
+
+    Args:
+        path (str): Cesta k souboru checkpointu.
+        population (np.ndarray): Aktuální populace (population_size, n_cities).
+        distances (np.ndarray): Délky cest aktuální populace.
+        best_route (list): Dosud nejlepší cesta (nebo None).
+        best_distance (float): Délka dosud nejlepší cesty.
+        generation (int): Počet dokončených generací.
+        last_improvement (int): Generace posledního zlepšení (pro ukončení při stagnaci).
+        mutation_rate (float): Aktuální míra mutace (mění se v adaptivním režimu).
+        locally_optimal_keys (iterable): Klíče elit, které už prošly lokálním prohledáváním
+            (viz TSPGeneticSolver._apply_local_search); ovlivňují další průběh memetického běhu.
+    """
+    version, keys, position = random.getstate()
+    bit_generator, numpy_keys, numpy_position, has_gauss, cached_gaussian = np.random.get_state()
+    metadata = {
+        "version": CHECKPOINT_VERSION,
+        "generation": generation,
+        "best_distance": best_distance,
+        "last_improvement": last_improvement,
+        "mutation_rate": mutation_rate,
+        "random_state": [version, list(keys), position],
+        "numpy_state": [bit_generator, numpy_position, has_gauss, cached_gaussian],
+    }
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as file:
+        np.savez_compressed(
+            file,
+            metadata=np.array(json.dumps(metadata)),
+            population=population,
+            distances=distances,
+            best_route=np.array(best_route if best_route is not None else [], dtype=np.intp),
+            numpy_keys=numpy_keys,
+            # Klíče jsou 16bajtové hashe; seřazené, aby obsah souboru nezávisel na pořadí v množině
+            locally_optimal_keys=np.frombuffer(b"".join(sorted(locally_optimal_keys)),
+                                               dtype=np.uint8).reshape(-1, 16),
+        )
+    os.replace(temporary_path, path)
+
+
+def load_checkpoint(path):
+    """
+    Načte checkpoint uložený funkcí save_checkpoint.
+
+    Returns:
+        dict: Klíče population, distances, best_route (list nebo None), best_distance, generation,
+              last_improvement, mutation_rate, locally_optimal_keys (set), random_state
+              a numpy_state (pro restore_random_state).
+    """
+    with np.load(path) as data:
+        metadata = json.loads(str(data["metadata"]))
+        if metadata["version"] != CHECKPOINT_VERSION:
+            raise ValueError(f"Nepodporovaná verze checkpointu {metadata['version']}.")
+        best_route = data["best_route"].tolist()
+        bit_generator, numpy_position, has_gauss, cached_gaussian = metadata["numpy_state"]
+        version, keys, position = metadata["random_state"]
+        # Starší checkpointy množinu lokálně optimálních elit neobsahují
+        optimal_keys = data["locally_optimal_keys"] if "locally_optimal_keys" in data.files else ()
+        return {
+            "population": data["population"].astype(np.intp),
+            "distances": data["distances"],
+            "best_route": best_route or None,
+            "best_distance": metadata["best_distance"],
+            "generation": metadata["generation"],
+            "last_improvement": metadata["last_improvement"],
+            "mutation_rate": metadata["mutation_rate"],
+            "locally_optimal_keys": {row.tobytes() for row in optimal_keys},
+            "random_state": (version, tuple(keys), position),
+            "numpy_state": (bit_generator, data["numpy_keys"], numpy_position, has_gauss, cached_gaussian),
+        }
+
+
+def restore_random_state(checkpoint):
+    """Obnoví stav generátorů random a np.random z načteného checkpointu."""
+    random.setstate(checkpoint["random_state"])
+    np.random.set_state(checkpoint["numpy_state"])
@@ -0,0 +1,299 @@
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from graph_generator import DistanceMatrix
+from local_search import LocalSearch
+from solver import TSPGeneticSolver
+from sparse_graph import SparseGraph
+
+# Způsoby rozdělení měst do shluků
+CLUSTERING_METHODS = ("grid", "kmeans")
+
+# Kolik prvků (měst * středů) se při přiřazování k-means zpracuje najednou - omezuje špičku paměti
+_BLOCK_ELEMENTS = 4_000_000
+
+
+def grid_clusters(coordinates, cluster_size):
+    """
+    Rozdělí města podle čtvercové mřížky, ve které je v průměru 'cluster_size' měst na buňku.
+
+    Returns:
+        np.ndarray: Číslo shluku pro každé město (0 .. počet neprázdných buněk - 1).
+    """
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    origin = coordinates.min(axis=0)
+    extent = float((coordinates.max(axis=0) - origin).max()) or 1.0
+    n_cells = max(1, int(np.ceil(np.sqrt(len(coordinates) / cluster_size))))
+    cells = np.minimum(((coordinates - origin) / (extent / n_cells)).astype(np.intp), n_cells - 1)
+    # Prázdné buňky vynecháme, shluky se očíslují souvisle
+    return np.unique(cells[:, 0] * n_cells + cells[:, 1], return_inverse=True)[1].ravel()
+
+
+def kmeans_clusters(coordinates, n_clusters, n_iterations=20):
+    """
+    Rozdělí města algoritmem k-means (Lloydovy iterace); počáteční středy jsou náhodná města.
+    Přiřazení ke středům se počítá po blocích maticovým násobením (|c|^2 - 2 x.c má stejné
+    minimum jako |x - c|^2), paměť je lineární v počtu měst.
+
+    Returns:
+        np.ndarray: Číslo shluku pro každé město (0 .. počet neprázdných shluků - 1).
+    """
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    n = len(coordinates)
+    n_clusters = min(n_clusters, n)
+    centers = coordinates[np.random.choice(n, n_clusters, replace=False)]
+    labels = np.full(n, -1, dtype=np.intp)
+    block_rows = max(1, _BLOCK_ELEMENTS // n_clusters)
+    for _ in range(n_iterations):
+        new_labels = np.empty(n, dtype=np.intp)
+        squared_norms = np.einsum('ij,ij->i', centers, centers)
+        for start in range(0, n, block_rows):
+            scores = squared_norms - 2.0 * (coordinates[start:start + block_rows] @ centers.T)
+            new_labels[start:start + block_rows] = np.argmin(scores, axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        counts = np.bincount(labels, minlength=n_clusters)
+        occupied = counts > 0
+        # Prázdný shluk si ponechá svůj střed
+        for axis in range(2):
+            sums = np.bincount(labels, weights=coordinates[:, axis], minlength=n_clusters)
+            centers[occupied, axis] = sums[occupied] / counts[occupied]
+    return np.unique(labels, return_inverse=True)[1].ravel()
+
+
+def _euclidean_matrix(coordinates, rounding=None):
+    """Plná matice vzdáleností pro malou podmnožinu měst (shluk, okno opravy)."""
+    points = DistanceMatrix.from_arrays(coordinates, rounding=rounding)
+    return points._compute_distance_matrix()
+
+
+def _solve_cluster(coordinates, rounding, solver_kwargs, seed):
+    """
+    Vyřeší podúlohu jednoho shluku (volá se v pracovním procesu).
+
+    Returns:
+        np.ndarray: Okružní cesta přes města shluku (lokální indexy).
+    """
+    n = len(coordinates)
+    if n < 4:
+        return np.arange(n)  # Pro nejvýš tři města jsou všechna pořadí stejně dlouhá
+    random.seed(seed)
+    np.random.seed(seed)
+    matrix = DistanceMatrix.from_arrays(coordinates, _euclidean_matrix(coordinates, rounding), rounding=rounding)
+    solver = TSPGeneticSolver(matrix, verbose=False, **solver_kwargs)
+    route, _ = solver.solve()
+    return np.asarray(route, dtype=np.intp)
+
+
+class DecompositionSolver:
+    """
+    Řešení velkých instancí (desítky až stovky tisíc měst) rozkladem: města se rozdělí do
+    prostorových shluků, podúlohy shluků se řeší genetickým algoritmem paralelně v samostatných
+    procesech, pořadí shluků určí malý GA nad jejich středy a podcesty se spojí do jedné cesty,
+    jejíž přechody mezi shluky se opraví 2-opt/Or-opt lokálním prohledáváním.
+
+    Paměť je lineární v počtu měst - plná matice vzdáleností se nikdy nepočítá,
+    jen malé matice jednotlivých shluků a oken opravy.
+    """
+
+    def __init__(self, distance_matrix, population_size, mutation_rate, n_generations, elite_size=1,
+                 tournament_size=3, cluster_size=200, clustering="kmeans", crossover="eax", mutation="inversion",
+                 seeding=("greedy",), order_generations=200, repair_window=50, n_workers=None, seed=None,
+                 verbose=True):
+        """
+        Inicializuje rozkladový solver.
+
+        Args:
+            distance_matrix (DistanceMatrix): Instance se souřadnicemi měst (plná matice není potřeba).
+            population_size (int): Počet jedinců v populaci GA jednoho shluku.
+            mutation_rate (float): Pravděpodobnost, s jakou dojde k mutaci jedince.
+            n_generations (int): Počet generací GA pro každý shluk.
+            elite_size (int): Počet nejlepších jedinců, kteří automaticky postoupí do další generace.
+            tournament_size (int): Počet jedinců vybíraných do turnaje při selekci.
+            cluster_size (int): Průměrný počet měst ve shluku.
+            clustering (str): Způsob rozdělení do shluků - "grid" nebo "kmeans".
+            crossover (str): Operátor křížení pro GA shluků i středů (viz operators.CROSSOVERS).
+            mutation (str): Operátor mutace (viz operators.MUTATIONS).
+            seeding (tuple): Konstrukční heuristiky pro počáteční populace (viz seeding.SEEDING_STRATEGIES).
+            order_generations (int): Počet generací GA, který určuje pořadí shluků.
+            repair_window (int): Kolik měst na každé straně přechodu mezi shluky se opravuje.
+            n_workers (int, optional): Počet pracovních procesů. Výchozí je počet jader CPU.
+            seed (int, optional): Základní seed; shluk i dostane seed + i.
+            verbose (bool): Zda vypisovat průběh výpočtu na standardní výstup.
+        """
+        if isinstance(distance_matrix, SparseGraph) or distance_matrix.coordinates is None:
+            raise ValueError("Rozklad na shluky vyžaduje úplnou instanci se souřadnicemi měst.")
+        if clustering not in CLUSTERING_METHODS:
+            raise ValueError(f"Neznámý způsob shlukování '{clustering}', povolené jsou: "
+                             f"{', '.join(CLUSTERING_METHODS)}.")
+        if cluster_size < 4:
+            raise ValueError("Průměrná velikost shluku musí být alespoň 4.")
+        if repair_window < 2:
+            raise ValueError("Okno opravy přechodů musí mít alespoň 2 města.")
+
+        self.distance_matrix = distance_matrix
+        self.n_cities = distance_matrix.number_of_cities
+        self.cluster_size = cluster_size
+        self.clustering = clustering
+        self.order_generations = order_generations
+        self.repair_window = repair_window
+        self.n_workers = int(n_workers or os.cpu_count() or 1)
+        self.seed = seed
+        self.verbose = verbose
+        self.solver_kwargs = dict(population_size=population_size, mutation_rate=mutation_rate,
+                                  n_generations=n_generations, elite_size=elite_size,
+                                  tournament_size=tournament_size, crossover=crossover, mutation=mutation,
+                                  seeding=seeding)
+
+        # Ověříme parametry GA na malé instanci (celou by nešlo vytvořit kvůli paměti)
+        probe = DistanceMatrix.from_arrays(distance_matrix.coordinates[:4])
+        TSPGeneticSolver(probe, verbose=False, **self.solver_kwargs)
+
+        self.n_clusters = 0
+        self.timings = {}  # Doba jednotlivých fází v sekundách
+
+    def _cluster(self):
+        """Rozdělí města do shluků; vrací seznam polí s indexy měst jednotlivých shluků."""
+        coordinates = self.distance_matrix.coordinates
+        if self.clustering == "grid":
+            labels = grid_clusters(coordinates, self.cluster_size)
+        else:
+            labels = kmeans_clusters(coordinates, max(1, round(self.n_cities / self.cluster_size)))
+        order = np.argsort(labels, kind="stable")
+        bounds = np.cumsum(np.bincount(labels))[:-1]
+        return np.split(order, bounds)
+
+    def _solve_clusters(self, clusters, base_seed):
+        """Vyřeší podúlohy všech shluků paralelně; vrací cesty v globálních indexech měst."""
+        coordinates = self.distance_matrix.coordinates
+        args = ([coordinates[members] for members in clusters],
+                [self.distance_matrix.rounding] * len(clusters),
+                [self.solver_kwargs] * len(clusters),
+                [(base_seed + idx) % 2 ** 32 for idx in range(len(clusters))])
+        if self.n_workers == 1:
+            local_routes = list(map(_solve_cluster, *args))
+        else:
+            with ProcessPoolExecutor(max_workers=self.n_workers) as executor:
+                chunksize = max(1, len(clusters) // (4 * self.n_workers))
+                local_routes = list(executor.map(_solve_cluster, *args, chunksize=chunksize))
+        return [members[route] for members, route in zip(clusters, local_routes)]
+
+    def _order_clusters(self, centroids, seed):
+        """Pořadí shluků: okružní cesta přes jejich středy nalezená malým GA."""
+        if len(centroids) < 4:
+            return np.arange(len(centroids))
+        # Vlastní seed, aby pořadí nezáviselo na tom, zda se shluky řešily v tomto procesu
+        random.seed(seed)
+        np.random.seed(seed)
+        order_kwargs = dict(self.solver_kwargs, n_generations=self.order_generations)
+        matrix = DistanceMatrix.from_arrays(centroids, _euclidean_matrix(centroids))
+        route, _ = TSPGeneticSolver(matrix, verbose=False, **order_kwargs).solve()
+        return np.asarray(route, dtype=np.intp)
+
+    def _stitch(self, sub_routes, centroids, order):
+        """
+        Spojí podcesty shluků v daném pořadí. Každá okružní podcesta se rozpojí u města nejbližšího
+        poslednímu městu předchozího shluku a projde se směrem, ve kterém končí blíž dalšímu shluku.
+
+        Returns:
+            tuple: (cesta přes všechna města, pozice v cestě, kde začínají jednotlivé shluky)
+        """
+        coordinates = self.distance_matrix.coordinates
+        parts = []
+        exit_point = centroids[order[-1]]
+        for idx, cluster in enumerate(order):
+            cycle = sub_routes[cluster]
+            if len(cycle) > 1:
+                entry = int(np.argmin(((coordinates[cycle] - exit_point) ** 2).sum(axis=1)))
+                cycle = np.roll(cycle, -entry)
+                following = centroids[order[(idx + 1) % len(order)]]
+                forward_end = ((coordinates[cycle[-1]] - following) ** 2).sum()
+                backward_end = ((coordinates[cycle[1]] - following) ** 2).sum()
+                if backward_end < forward_end:
+                    cycle = np.concatenate([cycle[:1], cycle[:0:-1]])
+            parts.append(cycle)
+            exit_point = coordinates[cycle[-1]]
+        junctions = np.cumsum([len(part) for part in parts])[:-1]
+        return np.concatenate(parts), np.concatenate([[0], junctions])
+
+    def _repair_boundaries(self, route, junctions):
+        """
+        Opraví okolí přechodů mezi shluky: úsek 2 * repair_window měst kolem každého přechodu
+        se vylepší lokálním prohledáváním s pevnými krajními městy (úsek zůstane napojený na zbytek cesty).
+        """
+        coordinates = self.distance_matrix.coordinates
+        rounding = self.distance_matrix.rounding
+        n = len(route)
+        if n <= 2 * self.repair_window:
+            matrix = DistanceMatrix.from_arrays(coordinates, _euclidean_matrix(coordinates, rounding), rounding=rounding)
+            route[:], _, _ = LocalSearch(matrix).improve(route)
+            return
+
+        width = 2 * self.repair_window
+        for junction in junctions:
+            positions = (junction - self.repair_window + np.arange(width)) % n
+            cities = route[positions]
+            distances = _euclidean_matrix(coordinates[cities], rounding)
+            # Hrana mezi krajními městy okna je silně záporná, takže ji žádný tah neodstraní;
+            # okružní cesta přes okno pak odpovídá cestě s pevnými konci
+            distances[0, -1] = distances[-1, 0] = -distances.max() * width
+            tour, _, _ = LocalSearch(DistanceMatrix.from_arrays(None, distances)).improve(np.arange(width))
+            tour = np.roll(tour, -int(np.flatnonzero(tour == 0)[0]))
+            if tour[-1] != width - 1:
+                tour = np.concatenate([tour[:1], tour[:0:-1]])
+            route[positions] = cities[tour]
+
+    def solve(self):
+        """
+        Spustí rozkladový solver a vrátí nejlepší nalezenou cestu a její délku.
+        """
+        base_seed = self.seed if self.seed is not None else random.randrange(2 ** 32)
+        np.random.seed(base_seed)
+        random.seed(base_seed)
+
+        started = time.perf_counter()
+        clusters = self._cluster()
+        self.n_clusters = len(clusters)
+        self.timings["clustering"] = time.perf_counter() - started
+        if self.verbose:
+            print(f"Rozklad {self.n_cities} měst na {self.n_clusters} shluků ({self.clustering}), "
+                  f"řešení v {self.n_workers} procesech...")
+
+        started = time.perf_counter()
+        sub_routes = self._solve_clusters(clusters, base_seed)
+        self.timings["clusters"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        coordinates = self.distance_matrix.coordinates
+        centroids = np.array([coordinates[members].mean(axis=0) for members in clusters])
+        order = self._order_clusters(centroids, (base_seed + self.n_clusters) % 2 ** 32)
+        route, junctions = self._stitch(sub_routes, centroids, order)
+        self.timings["stitching"] = time.perf_counter() - started
+        if self.verbose:
+            print(f"Podcesty spojeny, délka před opravou přechodů: {self._route_length(route):.2f}")
+
+        started = time.perf_counter()
+        self._repair_boundaries(route, junctions)
+        self.timings["repair"] = time.perf_counter() - started
+
+        best_distance = self._route_length(route)
+        if self.verbose:
+            print(f"Rozkladový solver dokončen. Nejlepší nalezená vzdálenost: {best_distance:.2f}")
+        return route.tolist(), best_distance
+
+    def _route_length(self, route):
+        """Délka okružní cesty (vzdálenosti se počítají vektorizovaně, bez plné matice)."""
+        return float(self.distance_matrix.get_distances(route, np.roll(route, -1)).sum(dtype=np.float64))
+
+
+if __name__ == "__main__":
+    matrix = DistanceMatrix(number_of_cities=20000, coord_range_max=100000, store_matrix=False)
+    decomposition_solver = DecompositionSolver(matrix, population_size=40, mutation_rate=0.1, n_generations=100,
+                                               cluster_size=200, seed=42)
+    route, distance = decomposition_solver.solve()
+    print(f"Délka cesty: {distance:.2f}, doby fází: {decomposition_solver.timings}")
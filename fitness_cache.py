@@ -0,0 +1,87 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+def canonical_routes(population):
+    """
+    Převede cesty do kanonického tvaru nezávislého na rotaci a směru průchodu.
+
+    Každá cesta se otočí tak, aby začínala městem 0, a pokud je druhé město větší
+    než poslední, obrátí se směr. Stejné okružní cesty tak mají stejný řádek.
+
+    Args:
+        population (np.ndarray): Pole (počet cest, n_cities) s indexy měst.
+
+    Returns:
+        np.ndarray: Pole stejného tvaru s kanonickými cestami.
+    """
+    population = np.asarray(population)
+    n_cities = population.shape[1]
+    start_positions = np.argmin(population, axis=1)  # Pozice města 0
+    shifted = (np.arange(n_cities) + start_positions[:, np.newaxis]) % n_cities
+    canonical = np.take_along_axis(population, shifted, axis=1)
+
+    # Obrácení směru: [0, a, ..., b] -> [0, b, ..., a], pokud a > b
+    reverse = canonical[:, 1] > canonical[:, -1]
+    canonical[reverse, 1:] = canonical[reverse, :0:-1]
+    return canonical
+
+
+def route_keys(population):
+    """Vrátí pro každou cestu krátký hash jejího kanonického tvaru (použitelný jako klíč slovníku)."""
+    canonical = np.ascontiguousarray(canonical_routes(population))
+    return [hashlib.blake2b(row.tobytes(), digest_size=16).digest() for row in canonical]
+
+
+class LRUCache:
+    """Omezená LRU cache s počítadly úspěšných a neúspěšných dotazů (hodnoty nesmí být None)."""
+
+    def __init__(self, max_size):
+        """
+        Args:
+            max_size (int): Maximální počet uložených položek; nejdéle nepoužité se vyřazují.
+        """
+        if max_size < 1:
+            raise ValueError("Velikost cache musí být alespoň 1.")
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Vrátí uloženou hodnotu, nebo None pokud v cache není."""
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Uloží hodnotu, případně vyřadí nejdéle nepoužitou položku."""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        """Podíl úspěšných dotazů (0.0 pokud zatím žádný dotaz nebyl)."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class FitnessCache(LRUCache):
+    """
+    Omezená LRU cache délek cest, klíčovaná kanonickým hashem cesty.
+    Po konvergenci populace se stejné cesty opakují velmi často, a díky cache se počítají jen jednou.
+    """
+
+    def __init__(self, max_size=10_000):
+        super().__init__(max_size)
@@ -1,10 +1,14 @@
 import numpy as np
-import random
-import math  # Potřebujeme pro výpočet vzdálenosti
+
+# Způsoby zaokrouhlení Euklidovské vzdálenosti (odpovídají typům EUC_2D a CEIL_2D z TSPLIB)
+ROUNDING_MODES = (None, "nint", "ceil")
 
 
 class DistanceMatrix:
-    def __init__(self, number_of_cities=10, coord_range_max=1000):
+    # Kolik prvků (řádků * sloupců) se při výpočtu matice zpracuje najednou - omezuje špičku paměti
+    _BLOCK_ELEMENTS = 4_000_000
+
+    def __init__(self, number_of_cities=10, coord_range_max=1000, dtype=np.float64, store_matrix=True):
         """
         Inicializuje matici vzdáleností.
         Generuje náhodné souřadnice pro města a počítá Euklidovské vzdálenosti.
@@ -13,41 +17,148 @@ class DistanceMatrix:
             number_of_cities (int): Počet měst.
             coord_range_max (int): Maximální hodnota pro X a Y souřadnice měst.
                                    Města budou mít souřadnice v rozsahu [0, coord_range_max].
+            dtype (np.dtype): Datový typ vzdáleností (např. np.float32 pro poloviční paměť).
+            store_matrix (bool): Pokud False, plná matice n×n se neukládá a vzdálenosti
+                                 se počítají ze souřadnic až při dotazu (pro velké instance).
         """
         if number_of_cities < 2:
             raise ValueError("Počet měst musí být alespoň 2.")
 
         self.number_of_cities = int(number_of_cities)
         self.coord_range_max = int(coord_range_max)
+        self.dtype = np.dtype(dtype)
+        self.store_matrix = bool(store_matrix)
+        self.rounding = None  # Náhodné instance používají nezaokrouhlené vzdálenosti
         self.coordinates = np.zeros((self.number_of_cities, 2))  # Pro uložení (x, y)
-        self.distances = np.zeros((self.number_of_cities, self.number_of_cities))
+        self.distances = None  # V režimu bez matice zůstane None
+        self.distances_from_coordinates = True  # Matice je určena souřadnicemi (viz from_arrays)
         self._generate_coordinates_and_distances()
 
+    @classmethod
+    def from_arrays(cls, coordinates, distances=None, dtype=None, rounding=None, distances_from_coordinates=None):
+        """
+        Vytvoří matici vzdáleností z již existujících polí (bez generování).
+
+        Args:
+            coordinates (np.ndarray): Pole (n_cities, 2) se souřadnicemi měst. Může být None,
+                                      pokud je zadaná matice vzdáleností (explicitní instance).
+            distances (np.ndarray, optional): Matice (n_cities, n_cities). Pokud chybí,
+                                              vzdálenosti se počítají ze souřadnic až při dotazu.
+            dtype (np.dtype, optional): Datový typ vzdáleností; výchozí je dtype matice, jinak float64.
+            rounding (str, optional): Zaokrouhlení vzdáleností počítaných ze souřadnic ("nint", "ceil").
+            distances_from_coordinates (bool, optional): Zda je zadaná matice spočítaná ze souřadnic.
+                                      Výchozí je True jen bez matice; explicitní matice se souřadnicemi
+                                      jen pro zobrazení (TSPLIB DISPLAY_DATA_SECTION) musí mít False.
+
+        Returns:
+            DistanceMatrix: Nová instance sdílející předaná pole (nekopírují se).
+        """
+        if rounding not in ROUNDING_MODES:
+            raise ValueError(f"Neznámý způsob zaokrouhlení '{rounding}'.")
+        if coordinates is None and distances is None:
+            raise ValueError("Je potřeba zadat souřadnice nebo matici vzdáleností.")
+        if coordinates is not None:
+            coordinates = np.asarray(coordinates)
+            if coordinates.ndim != 2 or coordinates.shape[1] != 2:
+                raise ValueError("Souřadnice musí mít tvar (počet měst, 2).")
+        n_cities = coordinates.shape[0] if coordinates is not None else distances.shape[0]
+        if n_cities < 2:
+            raise ValueError("Počet měst musí být alespoň 2.")
+        if distances is not None and distances.shape != (n_cities, n_cities):
+            raise ValueError("Tvar matice vzdáleností neodpovídá počtu měst.")
+
+        matrix = cls.__new__(cls)
+        matrix.number_of_cities = n_cities
+        matrix.coord_range_max = int(np.ceil(coordinates.max())) if coordinates is not None else 0
+        if dtype is not None:
+            matrix.dtype = np.dtype(dtype)
+        else:
+            matrix.dtype = distances.dtype if distances is not None else np.dtype(np.float64)
+        matrix.store_matrix = distances is not None
+        matrix.rounding = rounding
+        matrix.coordinates = coordinates
+        matrix.distances = distances
+        if distances_from_coordinates is None:
+            distances_from_coordinates = distances is None
+        matrix.distances_from_coordinates = coordinates is not None and bool(distances_from_coordinates)
+        return matrix
+
+    def __getstate__(self):
+        # Matice namapovaná ze souboru .npy (viz instance_loader) se při předání do jiného
+        # procesu nekopíruje - přenese se jen cesta a druhá strana soubor namapuje znovu
+        state = self.__dict__.copy()
+        if isinstance(self.distances, np.memmap) and self.distances.filename:
+            state["distances"] = None
+            state["_distances_file"] = self.distances.filename
+        return state
+
+    def __setstate__(self, state):
+        distances_file = state.pop("_distances_file", None)
+        self.__dict__.update(state)
+        if distances_file is not None:
+            self.distances = np.load(distances_file, mmap_mode='r')
+
     def _generate_coordinates_and_distances(self):
         """Generuje náhodné souřadnice a vypočítá matici vzdáleností."""
-        for city in range(self.number_of_cities):
-            # Generuj náhodné (x, y) souřadnice
-            self.coordinates[city][0] = random.randint(0, self.coord_range_max)
-            self.coordinates[city][1] = random.randint(0, self.coord_range_max)
-
-        # Vypočítej vzdálenosti mezi všemi páry měst
-        for city in range(self.number_of_cities):
-            for to_city in range(city, self.number_of_cities):  # Stačí počítat horní trojúhelník
-                if city == to_city:
-                    self.distances[city][to_city] = 0
-                else:
-                    # Euklidovská vzdálenost
-                    dist = math.sqrt(
-                        (self.coordinates[city][0] - self.coordinates[to_city][0]) ** 2 +
-                        (self.coordinates[city][1] - self.coordinates[to_city][1]) ** 2
-                    )
-                    self.distances[city][to_city] = dist
-                    self.distances[to_city][city] = dist  # Matice je symetrická
+        # Náhodné celočíselné (x, y) souřadnice pro všechna města najednou
+        self.coordinates = np.random.randint(
+            0, self.coord_range_max + 1, size=(self.number_of_cities, 2)
+        ).astype(np.float64)
+
+        if self.store_matrix:
+            self.distances = self._compute_distance_matrix()
+
+    def _compute_distance_matrix(self, out=None):
+        """
+        Vypočítá celou matici Euklidovských vzdáleností vektorizovaně.
+        Počítá se po blocích řádků, aby mezivýsledky nezabraly víc paměti než samotná matice.
+
+        Args:
+            out (np.ndarray, optional): Předalokované pole (n, n) pro výsledek, např. np.memmap.
+        """
+        n = self.number_of_cities
+        distances = out if out is not None else np.empty((n, n), dtype=self.dtype)
+        block_rows = max(1, self._BLOCK_ELEMENTS // n)
+        for start in range(0, n, block_rows):
+            end = min(start + block_rows, n)
+            diff = self.coordinates[start:end, np.newaxis, :] - self.coordinates[np.newaxis, :, :]
+            distances[start:end] = self._round(np.sqrt(np.einsum('ijk,ijk->ij', diff, diff)))
+        return distances
+
+    def _round(self, distances):
+        """Zaokrouhlí vzdálenosti podle self.rounding (TSPLIB: nint = floor(x + 0.5))."""
+        if self.rounding == "nint":
+            return np.floor(distances + 0.5)
+        if self.rounding == "ceil":
+            return np.ceil(distances)
+        return distances
 
     def get_distance(self, city1, city2):
         """Vrátí vzdálenost mezi city1 a city2."""
         # Zajistíme, že indexy jsou integer
-        return self.distances[int(city1)][int(city2)]
+        if self.distances is not None:
+            return self.distances[int(city1)][int(city2)]
+        return self.get_distances(int(city1), int(city2))[()]
+
+    def get_distances(self, from_cities, to_cities):
+        """
+        Vrátí vzdálenosti pro celá pole dvojic měst najednou (prvek po prvku).
+
+        Args:
+            from_cities (np.ndarray): Indexy výchozích měst (libovolný tvar).
+            to_cities (np.ndarray): Indexy cílových měst (stejný tvar jako from_cities).
+
+        Returns:
+            np.ndarray: Pole vzdáleností stejného tvaru jako vstupy.
+        """
+        from_cities = np.asarray(from_cities, dtype=np.intp)
+        to_cities = np.asarray(to_cities, dtype=np.intp)
+        if self.distances is not None:
+            return self.distances[from_cities, to_cities]
+        # Režim bez matice: vzdálenosti počítáme ze souřadnic
+        diff = self.coordinates[from_cities] - self.coordinates[to_cities]
+        distances = self._round(np.sqrt(np.einsum('...k,...k->...', diff, diff)))
+        return distances.astype(self.dtype, copy=False)
 
     def get_coordinates(self):
         """Vrátí pole se souřadnicemi měst."""
@@ -57,11 +168,17 @@ class DistanceMatrix:
         """Vytiskne matici vzdáleností (zaokrouhleně)."""
         with np.printoptions(precision=2, suppress=True):
             print("Matice vzdáleností:")
-            print(self.distances)
+            if self.distances is None:
+                print("(matice není uložena, vzdálenosti se počítají ze souřadnic)")
+            else:
+                print(self.distances)
 
     def print_coordinates(self):
         """Vytiskne souřadnice měst."""
         print("\nSouřadnice měst:")
+        if self.coordinates is None:
+            print("(instance nemá souřadnice)")
+            return
         for i, coord in enumerate(self.coordinates):
             print(f"Město {i}: ({coord[0]:.0f}, {coord[1]:.0f})")
 
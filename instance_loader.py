@@ -0,0 +1,279 @@
+import csv
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from graph_generator import DistanceMatrix
+
+# Adresář, kam se ukládají spočítané matice vzdáleností (klíčem je hash souboru instance)
+DEFAULT_CACHE_DIR = ".tsp_cache"
+
+# Podporované typy vzdáleností TSPLIB pro instance se souřadnicemi a jejich zaokrouhlení
+_COORDINATE_TYPES = {"EUC_2D": "nint", "CEIL_2D": "ceil"}
+
+# Podporované formáty explicitní matice: funkce vrací rozsah sloupců uložených pro řádek i
+_EXPLICIT_FORMATS = {
+    "FULL_MATRIX": lambda i, n: (0, n),
+    "UPPER_ROW": lambda i, n: (i + 1, n),
+    "LOWER_ROW": lambda i, n: (0, i),
+    "UPPER_DIAG_ROW": lambda i, n: (i, n),
+    "LOWER_DIAG_ROW": lambda i, n: (0, i + 1),
+}
+
+_SECTIONS = ("NODE_COORD_SECTION", "EDGE_WEIGHT_SECTION", "DISPLAY_DATA_SECTION")
+
+
+def load_instance(path, dtype=np.float64, store_matrix=True, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Načte instanci TSP ze souboru TSPLIB (.tsp) nebo CSV se souřadnicemi (.csv).
+
+    Soubor se čte po řádcích, takže se celý nemusí vejít do paměti. Spočítaná matice
+    vzdáleností se uloží do 'cache_dir' jako .npy (klíčem je hash obsahu souboru)
+    a při dalším načtení se jen namapuje do paměti (mmap), bez přepočítávání.
+
+    Args:
+        path (str): Cesta k souboru instance.
+        dtype (np.dtype): Datový typ matice vzdáleností.
+        store_matrix (bool): Pokud False, matice se nepočítá a vzdálenosti se počítají ze souřadnic
+                             při dotazu (pro explicitní instance se ignoruje, matici vždy potřebují).
+        cache_dir (str, optional): Adresář cache; None cache vypne.
+
+    Returns:
+        DistanceMatrix: Načtená instance.
+    """
+    dtype = np.dtype(dtype)
+    is_csv = os.path.splitext(path)[1].lower() == ".csv"
+    header = {} if is_csv else _read_tsplib_header(path)
+    explicit = header.get("EDGE_WEIGHT_TYPE") == "EXPLICIT"
+    rounding = None
+    if not is_csv and not explicit:
+        weight_type = header.get("EDGE_WEIGHT_TYPE", "EUC_2D")
+        if weight_type not in _COORDINATE_TYPES:
+            raise ValueError(f"Nepodporovaný typ vzdáleností TSPLIB: {weight_type}.")
+        rounding = _COORDINATE_TYPES[weight_type]
+    store_matrix = store_matrix or explicit
+
+    matrix_path = coordinates_path = None
+    if cache_dir is not None and store_matrix:
+        digest = _file_digest(path)
+        matrix_path = os.path.join(cache_dir, f"{digest}_{dtype.name}.npy")
+        coordinates_path = os.path.join(cache_dir, f"{digest}_coords.npy")
+        if os.path.exists(matrix_path):
+            coordinates = np.load(coordinates_path) if os.path.exists(coordinates_path) else None
+            return DistanceMatrix.from_arrays(coordinates, np.load(matrix_path, mmap_mode='r'), rounding=rounding,
+                                      distances_from_coordinates=not explicit)
+
+    if is_csv:
+        coordinates = _parse_csv(path)
+    elif not explicit:
+        coordinates = _parse_tsplib(path, header)
+    else:
+        coordinates = None  # Explicitní matice se čte až přímo do cílového pole (viz níže)
+
+    if not store_matrix:
+        return DistanceMatrix.from_arrays(coordinates, dtype=dtype, rounding=rounding)
+
+    n_cities = coordinates.shape[0] if coordinates is not None else int(header["DIMENSION"])
+    if n_cities < 2:
+        raise ValueError("Počet měst musí být alespoň 2.")
+
+    # Matice se zapisuje rovnou do souboru cache, takže nemusí být celá v RAM. Dočasný soubor
+    # má jedinečné jméno, aby si souběžná načtení téže instance navzájem nepřepisovala data.
+    temporary_path = None
+    if matrix_path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        temporary_path = _temporary_file(cache_dir)
+        distances = np.lib.format.open_memmap(temporary_path, mode='w+', dtype=dtype, shape=(n_cities, n_cities))
+    else:
+        distances = np.empty((n_cities, n_cities), dtype=dtype)
+
+    try:
+        if explicit:
+            coordinates = _parse_tsplib(path, header, out=distances)
+        else:
+            DistanceMatrix.from_arrays(coordinates, dtype=dtype, rounding=rounding)._compute_distance_matrix(
+                out=distances)
+        if matrix_path is None:
+            return DistanceMatrix.from_arrays(coordinates, distances, rounding=rounding,
+                                              distances_from_coordinates=not explicit)
+
+        distances.flush()
+        del distances
+        # Souřadnice se uloží dřív, než se zveřejní matice - načtení z cache je pak najde vždy
+        if coordinates is not None:
+            coordinates_temporary_path = _temporary_file(cache_dir)
+            with open(coordinates_temporary_path, "wb") as file:
+                np.save(file, coordinates)
+            os.replace(coordinates_temporary_path, coordinates_path)
+        os.replace(temporary_path, matrix_path)
+    except BaseException:
+        if temporary_path is not None and os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+    return DistanceMatrix.from_arrays(coordinates, np.load(matrix_path, mmap_mode='r'), rounding=rounding,
+                                      distances_from_coordinates=not explicit)
+
+
+def _temporary_file(directory):
+    """Vytvoří v adresáři prázdný dočasný soubor s jedinečným jménem a vrátí jeho cestu."""
+    descriptor, path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(descriptor)
+    return path
+
+
+def _file_digest(path, chunk_size=1 << 20):
+    """Vrátí SHA-256 hash obsahu souboru (čte se po blocích)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+
+def _read_tsplib_header(path):
+    """Načte klíče hlavičky TSPLIB (NAME, DIMENSION, EDGE_WEIGHT_TYPE, ...) až po první sekci s daty."""
+    header = {}
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            if line.split()[0].rstrip(":").upper() in _SECTIONS or line.upper() == "EOF":
+                break
+            if ":" in line:
+                key, value = line.split(":", 1)
+                header[key.strip().upper()] = value.strip().upper()
+    if "DIMENSION" not in header:
+        raise ValueError("Soubor TSPLIB neobsahuje DIMENSION.")
+    return header
+
+
+def _parse_tsplib(path, header, out=None):
+    """
+    Přečte datové sekce souboru TSPLIB.
+
+    Explicitní matice vzdáleností (EDGE_WEIGHT_SECTION) se čte po řádcích přímo do pole 'out',
+    takže se v paměti nikdy nedrží všechny hodnoty najednou.
+
+    Args:
+        path (str): Cesta k souboru.
+        header (dict): Hlavička načtená funkcí _read_tsplib_header.
+        out (np.ndarray, optional): Pole (n, n), do kterého se zapíše explicitní matice.
+
+    Returns:
+        np.ndarray: Souřadnice (n, 2); u explicitní matice souřadnice z DISPLAY_DATA_SECTION nebo None.
+    """
+    n_cities = int(header["DIMENSION"])
+    weight_format = header.get("EDGE_WEIGHT_FORMAT", "FULL_MATRIX")
+    coordinates = display_coordinates = None
+    has_weights = False
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            parts = line.split()
+            if not parts:
+                continue
+            keyword = parts[0].rstrip(":").upper()
+            if keyword == "EOF":
+                break
+            if keyword == "NODE_COORD_SECTION":
+                coordinates = _read_coordinate_lines(file, n_cities)
+            elif keyword == "DISPLAY_DATA_SECTION":
+                display_coordinates = _read_coordinate_lines(file, n_cities)
+            elif keyword == "EDGE_WEIGHT_SECTION":
+                if out is None:
+                    raise ValueError("EDGE_WEIGHT_SECTION vyžaduje EDGE_WEIGHT_TYPE: EXPLICIT.")
+                if weight_format not in _EXPLICIT_FORMATS:
+                    raise ValueError(f"Nepodporovaný formát explicitní matice: {weight_format}.")
+                _read_explicit_matrix(file, out, weight_format)
+                has_weights = True
+            elif keyword.endswith("_SECTION"):
+                raise ValueError(f"Nepodporovaná sekce TSPLIB: {keyword}.")
+
+    if out is not None:
+        if not has_weights:
+            raise ValueError("Soubor TSPLIB neobsahuje matici vzdáleností (EDGE_WEIGHT_SECTION).")
+        return display_coordinates
+    if coordinates is None:
+        raise ValueError("Soubor TSPLIB neobsahuje souřadnice ani matici vzdáleností.")
+    return coordinates
+
+
+def _read_coordinate_lines(file, n_cities):
+    """Přečte n_cities řádků 'id x y' (id číslované od 1) do pole (n_cities, 2)."""
+    coordinates = np.empty((n_cities, 2))
+    for _ in range(n_cities):
+        node, x, y = next(file).split()[:3]
+        coordinates[int(node) - 1] = float(x), float(y)
+    return coordinates
+
+
+def _read_explicit_matrix(file, distances, weight_format):
+    """
+    Přečte hodnoty explicitního formátu TSPLIB (rozložené libovolně po řádcích souboru) přímo
+    do matice 'distances'; v paměti se drží nejvýše jeden řádek matice. Trojúhelníkové formáty
+    se zrcadlí, plná matice musí být symetrická (řešič asymetrické vzdálenosti nepodporuje).
+    """
+    n_cities = distances.shape[0]
+    pending = np.empty(0)  # Přečtené hodnoty, které patří až do dalších řádků matice
+    for i in range(n_cities):
+        start, end = _EXPLICIT_FORMATS[weight_format](i, n_cities)
+        pieces, available = [pending], len(pending)
+        while available < end - start:
+            values = np.array(next(file).split(), dtype=np.float64)
+            pieces.append(values)
+            available += len(values)
+        values = np.concatenate(pieces) if len(pieces) > 1 else pending
+        row, pending = values[:end - start], values[end - start:]
+        distances[i, start:end] = row
+        if weight_format != "FULL_MATRIX":
+            distances[start:end, i] = row
+    if weight_format == "FULL_MATRIX":
+        _check_symmetric(distances)
+    else:
+        np.fill_diagonal(distances, 0)
+
+
+def _check_symmetric(distances, block_rows=1024):
+    """Ověří (po blocích řádků) symetrii matice; asymetrická matice vyvolá ValueError."""
+    n_cities = distances.shape[0]
+    for start in range(0, n_cities, block_rows):
+        end = min(start + block_rows, n_cities)
+        if not np.array_equal(distances[start:end], distances[:, start:end].T):
+            raise ValueError("Matice vzdáleností není symetrická; asymetrické instance nejsou podporované.")
+
+
+def _parse_csv(path, chunk_rows=65_536):
+    """
+    Přečte CSV se souřadnicemi. Hlavička je nepovinná; pokud obsahuje sloupce 'x' a 'y',
+    použijí se, jinak se berou poslední dva sloupce (např. 'id,x,y' nebo 'x,y').
+    """
+    chunks = []
+    rows = []
+    x_column, y_column = -2, -1
+    header_checked = False
+    with open(path, newline="", encoding="utf-8") as file:
+        for record in csv.reader(file):
+            if not record or not "".join(record).strip():
+                continue
+            if not header_checked:
+                # Hlavička může být jen na prvním neprázdném řádku
+                header_checked = True
+                names = [name.strip().lower() for name in record]
+                if "x" in names and "y" in names:
+                    x_column, y_column = names.index("x"), names.index("y")
+                    continue
+                try:
+                    float(record[x_column]), float(record[y_column])
+                except ValueError:
+                    continue  # Hlavička bez sloupců x/y
+            rows.append((float(record[x_column]), float(record[y_column])))
+            if len(rows) >= chunk_rows:
+                chunks.append(np.array(rows))
+                rows = []
+    if rows:
+        chunks.append(np.array(rows))
+    if not chunks:
+        raise ValueError("Soubor CSV neobsahuje žádné souřadnice.")
+    return np.concatenate(chunks)
@@ -0,0 +1,82 @@
+import csv
+import json
+
+# Fáze jedné generace, jejichž čas solver měří při profile_phases=True
+PHASES = ("elitism", "selection", "crossover", "fitness", "mutation", "local_search")
+
+# Výpisy pro předčasné ukončení výpočtu (viz TSPGeneticSolver.termination_reason)
+_TERMINATION_MESSAGES = {
+    "target": "Dosažena cílová vzdálenost, výpočet ukončen.",
+    "stall": "Nejlepší vzdálenost se dlouho nezlepšila, výpočet ukončen.",
+    "time_limit": "Vypršel časový limit, výpočet ukončen.",
+}
+
+
+class ConsoleReporter:
+    """
+    Pozorovatel TSPGeneticSolveru, který vypisuje průběh na standardní výstup
+    (nová nejlepší vzdálenost a pravidelný výpis každých 'report_every' generací).
+    """
+
+    def __init__(self, report_every=20):
+        self.report_every = report_every
+
+    def __call__(self, event):
+        kind = event["event"]
+        if kind == "start":
+            print(f"Spouštění GA pro TSP: {event['n_generations']} generací, "
+                  f"velikost populace {event['population_size']}...")
+        elif kind == "generation":
+            if event["improved"]:
+                print(f"Generace {event['generation']}: Nová nejlepší vzdálenost = {event['best_distance']:.2f}")
+            # Pravidelný výpis progresu, např. každých 20 generací nebo pokud není zlepšení
+            elif event["generation"] % self.report_every == 0:
+                print(f"Generace {event['generation']}: Aktuální nejlepší vzdálenost = {event['best_distance']:.2f}")
+        elif kind == "finish":
+            if event["cancelled"]:
+                print(f"Generace {event['generation'] + 1}: Výpočet zrušen.")
+            elif event["termination_reason"] in _TERMINATION_MESSAGES:
+                print(f"Generace {event['generation']}: {_TERMINATION_MESSAGES[event['termination_reason']]}")
+            print(f"GA dokončen. Nejlepší nalezená vzdálenost: {event['best_distance']:.2f}")
+            if event["stats"]["cache_hits"] or event["stats"]["cache_misses"]:
+                print(f"Úspěšnost fitness cache: {event['stats']['cache_hit_rate']:.1%}")
+
+
+class TraceRecorder:
+    """
+    Pozorovatel, který si ukládá metriky všech generací a souhrn běhu
+    a umí je exportovat do JSON nebo CSV.
+    """
+
+    def __init__(self):
+        self.generations = []
+        self.summary = None
+
+    def __call__(self, event):
+        if event["event"] == "generation":
+            # Cesta by trace zbytečně zvětšovala, ukládáme jen čísla
+            self.generations.append({key: value for key, value in event.items()
+                                     if key not in ("event", "best_route")})
+        elif event["event"] == "finish":
+            self.summary = {key: value for key, value in event.items() if key not in ("event", "best_route")}
+
+    def export(self, path):
+        """
+        Uloží trace do souboru; formát se určí podle přípony (.json nebo .csv).
+        CSV obsahuje jen metriky generací (časy fází jako sloupce 'time_<fáze>').
+        """
+        if path.lower().endswith(".csv"):
+            rows = []
+            for record in self.generations:
+                row = {key: value for key, value in record.items() if key != "phase_times"}
+                for phase, seconds in (record.get("phase_times") or {}).items():
+                    row[f"time_{phase}"] = seconds
+                rows.append(row)
+            with open(path, "w", newline="", encoding="utf-8") as file:
+                if rows:
+                    writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+                    writer.writeheader()
+                    writer.writerows(rows)
+        else:
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump({"generations": self.generations, "summary": self.summary}, file, indent=2)
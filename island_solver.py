@@ -0,0 +1,252 @@
+import multiprocessing as mp
+import os
+import queue
+import random
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from graph_generator import DistanceMatrix
+from solver import TSPGeneticSolver
+from sparse_graph import SparseGraph
+
+# Podporované topologie migrace mezi ostrovy
+TOPOLOGIES = ("ring", "full")
+
+
+def _share_array(array):
+    """
+    Zkopíruje pole do sdílené paměti.
+
+    Returns:
+        tuple: (SharedMemory, popis pole (name, shape, dtype) pro připojení v jiném procesu)
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    shared[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def _attach_array(spec):
+    """Připojí se k poli ve sdílené paměti podle popisu z _share_array (bez kopírování)."""
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _run_island(island_id, seed, distance_matrix, solver_kwargs, n_generations, migration_interval,
+                n_migrants, inbox, outbox):
+    """
+    Hlavní smyčka jednoho ostrova.
+
+    Po každých 'migration_interval' generacích pošle nejlepší jedince do 'outbox'
+    a z 'inbox' převezme imigranty, kterými nahradí své nejhorší jedince.
+    """
+    # Každý ostrov má vlastní seed, aby se populace vyvíjely nezávisle
+    random.seed(seed)
+    np.random.seed(seed)
+
+    solver = TSPGeneticSolver(distance_matrix, n_generations=n_generations, verbose=False, **solver_kwargs)
+    population = solver._initialize_population()
+    best_route = None
+    best_distance = float('inf')
+
+    generation = 0
+    while generation < n_generations:
+        epoch_generations = min(migration_interval, n_generations - generation)
+        population, route, distance = solver._evolve(population, epoch_generations, generation)
+        generation += epoch_generations
+        if distance < best_distance:
+            best_route, best_distance = route, distance
+
+        # Ohodnotíme i poslední populaci epochy (vybíráme z ní emigranty)
+        distances = solver._evaluate_population(population)
+        order = np.argsort(distances)
+        if distances[order[0]] < best_distance:
+            best_route, best_distance = population[order[0]].tolist(), float(distances[order[0]])
+
+        outbox.put((island_id, population[order[:n_migrants]].copy(), best_route, best_distance))
+        if generation >= n_generations:
+            break
+
+        # Imigranti nahradí nejhorší jedince ostrova
+        immigrants = inbox.get()
+        if len(immigrants):
+            population[order[len(order) - len(immigrants):]] = immigrants
+
+
+def _island_worker(island_id, seed, coordinates_spec, distances_spec, rounding, *args):
+    """Vstupní bod procesu ostrova: připojí sdílená pole a spustí _run_island."""
+    attached = []
+    coordinates = None
+    if coordinates_spec is not None:
+        coordinates_shm, coordinates = _attach_array(coordinates_spec)
+        attached.append(coordinates_shm)
+    distances = None
+    if distances_spec is not None:
+        distances_shm, distances = _attach_array(distances_spec)
+        attached.append(distances_shm)
+
+    _run_island(island_id, seed, DistanceMatrix.from_arrays(coordinates, distances, rounding=rounding), *args)
+
+    # Pohledy do sdílené paměti musí zaniknout dřív, než se paměť odpojí
+    del coordinates, distances
+    for shm in attached:
+        shm.close()
+
+
+class IslandGeneticSolver:
+    """
+    Ostrovní model genetického algoritmu: několik subpopulací se vyvíjí paralelně
+    v samostatných procesech a pravidelně si vyměňují nejlepší jedince.
+    """
+
+    def __init__(self, distance_matrix, population_size, mutation_rate, n_generations, elite_size=1,
+                 tournament_size=3, n_islands=None, migration_interval=20, n_migrants=2, topology="ring",
+                 seed=None, verbose=True):
+        """
+        Inicializuje ostrovní genetický algoritmus.
+
+        Args:
+            distance_matrix (DistanceMatrix): Objekt obsahující matici vzdáleností mezi městy.
+            population_size (int): Počet jedinců v populaci jednoho ostrova.
+            mutation_rate (float): Pravděpodobnost, s jakou dojde k mutaci jedince.
+            n_generations (int): Počet generací, po které algoritmus poběží.
+            elite_size (int): Počet nejlepších jedinců, kteří automaticky postoupí do další generace.
+            tournament_size (int): Počet jedinců vybíraných do turnaje při selekci.
+            n_islands (int, optional): Počet ostrovů (procesů). Výchozí je počet jader CPU.
+            migration_interval (int): Po kolika generacích probíhá migrace.
+            n_migrants (int): Kolik nejlepších jedinců každý ostrov posílá při migraci.
+            topology (str): Topologie migrace - "ring" (do sousedního ostrova) nebo "full" (do všech).
+            seed (int, optional): Základní seed; ostrov i dostane seed + i.
+            verbose (bool): Zda vypisovat průběh výpočtu na standardní výstup.
+        """
+        if isinstance(distance_matrix, SparseGraph):
+            raise ValueError("Ostrovní model zatím podporuje jen úplné instance (DistanceMatrix).")
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"Neznámá topologie '{topology}', povolené jsou: {', '.join(TOPOLOGIES)}.")
+        if migration_interval < 1:
+            raise ValueError("Interval migrace musí být alespoň 1.")
+        if not 0 <= n_migrants < population_size:
+            raise ValueError("Počet migrantů musí být menší než velikost populace ostrova.")
+
+        self.distance_matrix = distance_matrix
+        self.n_generations = n_generations
+        self.n_islands = int(n_islands or os.cpu_count() or 1)
+        self.migration_interval = migration_interval
+        self.n_migrants = n_migrants
+        self.topology = topology
+        self.seed = seed
+        self.verbose = verbose
+        self.solver_kwargs = dict(population_size=population_size, mutation_rate=mutation_rate,
+                                  elite_size=elite_size, tournament_size=tournament_size)
+
+        # Ověříme parametry stejně jako jednoprocesový solver
+        TSPGeneticSolver(distance_matrix, n_generations=n_generations, verbose=False, **self.solver_kwargs)
+
+    def _migration_sources(self, island_id):
+        """Vrátí indexy ostrovů, ze kterých ostrov 'island_id' přijímá migranty."""
+        if self.topology == "ring":
+            sources = [(island_id - 1) % self.n_islands]
+        else:
+            sources = range(self.n_islands)
+        return [source for source in sources if source != island_id]
+
+    @staticmethod
+    def _receive(outbox, processes):
+        """Přijme zprávu od ostrovů; pokud některý proces skončil chybou, vyhodí výjimku místo čekání."""
+        while True:
+            try:
+                return outbox.get(timeout=1.0)
+            except queue.Empty:
+                failed = [process for process in processes if process.exitcode not in (None, 0)]
+                if failed:
+                    raise RuntimeError(f"Proces ostrova skončil s chybou (exit code {failed[0].exitcode}).")
+
+    def solve(self):
+        """
+        Spustí ostrovní genetický algoritmus a vrátí nejlepší nalezenou cestu a její délku.
+        """
+        base_seed = self.seed if self.seed is not None else random.randrange(2 ** 32)
+        population_size = self.solver_kwargs["population_size"]
+
+        if self.verbose:
+            print(f"Spouštění ostrovního GA pro TSP: {self.n_islands} ostrovů, {self.n_generations} generací, "
+                  f"migrace každých {self.migration_interval} generací ({self.topology})...")
+
+        shared = []
+        processes = []
+        try:
+            # Souřadnice a matice se do procesů nepředávají kopií, ale přes sdílenou paměť
+            coordinates_spec = None
+            if self.distance_matrix.coordinates is not None:
+                coordinates_shm, coordinates_spec = _share_array(
+                    np.ascontiguousarray(self.distance_matrix.coordinates))
+                shared.append(coordinates_shm)
+            distances_spec = None
+            if self.distance_matrix.distances is not None:
+                distances_shm, distances_spec = _share_array(np.ascontiguousarray(self.distance_matrix.distances))
+                shared.append(distances_shm)
+
+            context = mp.get_context()
+            outbox = context.Queue()
+            inboxes = [context.Queue() for _ in range(self.n_islands)]
+            for island_id in range(self.n_islands):
+                process = context.Process(
+                    target=_island_worker,
+                    args=(island_id, (base_seed + island_id) % 2 ** 32, coordinates_spec, distances_spec,
+                          self.distance_matrix.rounding, self.solver_kwargs, self.n_generations,
+                          self.migration_interval, self.n_migrants, inboxes[island_id], outbox),
+                    daemon=True,
+                )
+                process.start()
+                processes.append(process)
+
+            best_route = None
+            best_distance = float('inf')
+            n_epochs = -(-self.n_generations // self.migration_interval)
+            for epoch in range(n_epochs):
+                emigrants = [None] * self.n_islands
+                for _ in range(self.n_islands):
+                    island_id, island_emigrants, route, distance = self._receive(outbox, processes)
+                    emigrants[island_id] = island_emigrants
+                    if distance < best_distance:
+                        best_route, best_distance = route, distance
+
+                generation = min((epoch + 1) * self.migration_interval, self.n_generations)
+                if self.verbose:
+                    print(f"Generace {generation}: Nejlepší vzdálenost přes všechny ostrovy = {best_distance:.2f}")
+
+                if epoch == n_epochs - 1:
+                    break
+
+                # Rozeslání migrantů podle topologie
+                for island_id in range(self.n_islands):
+                    sources = self._migration_sources(island_id)
+                    if sources:
+                        immigrants = np.concatenate([emigrants[source] for source in sources])[:population_size - 1]
+                    else:
+                        immigrants = np.empty((0, self.distance_matrix.number_of_cities), dtype=np.intp)
+                    inboxes[island_id].put(immigrants)
+
+            for process in processes:
+                process.join()
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            for shm in shared:
+                shm.close()
+                shm.unlink()
+
+        if self.verbose:
+            print(f"Ostrovní GA dokončen. Nejlepší nalezená vzdálenost: {best_distance:.2f}")
+        return best_route, best_distance
+
+
+if __name__ == "__main__":
+    matrix = DistanceMatrix(number_of_cities=100, coord_range_max=1000)
+    island_solver = IslandGeneticSolver(matrix, population_size=100, mutation_rate=0.1, n_generations=200,
+                                        n_islands=4, migration_interval=20, seed=42)
+    route, distance = island_solver.solve()
+    print(f"Nejlepší cesta: {route}")
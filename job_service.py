@@ -0,0 +1,255 @@
+import asyncio
+import hashlib
+import itertools
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from fitness_cache import LRUCache
+from solver_worker import solve_with_progress
+from sparse_graph import SparseGraph
+
+# Stavy úlohy (SolveJob.status)
+JOB_STATES = ("queued", "running", "done", "cancelled", "failed")
+
+# Kolik posledních úloh si služba pamatuje pro každou relaci
+SESSION_HISTORY = 20
+
+
+class ServiceBusyError(RuntimeError):
+    """Fronta úloh je plná - požadavek je potřeba zopakovat později."""
+
+
+def instance_key(distance_matrix):
+    """
+    Vrátí hash instance (souřadnice, případně matice vzdáleností, zaokrouhlení a dtype).
+
+    Pokud je matice určena souřadnicemi, hashují se jen souřadnice - nemusí se procházet n×n hodnot.
+    Explicitní matice (i se souřadnicemi jen pro zobrazení) se hashuje po řádcích.
+    Řídký graf se hashuje celý (pole CSR).
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{distance_matrix.number_of_cities}|{distance_matrix.rounding}|{distance_matrix.dtype}".encode())
+    if distance_matrix.coordinates is not None:
+        digest.update(distance_matrix.coordinates.tobytes())
+    if isinstance(distance_matrix, SparseGraph):
+        for array in (distance_matrix.indptr, distance_matrix.indices, distance_matrix.weights):
+            digest.update(array.tobytes())
+        digest.update(repr(distance_matrix.missing_edge_penalty).encode())
+    elif not distance_matrix.distances_from_coordinates:
+        for row in distance_matrix.distances:
+            digest.update(row.tobytes())
+    return digest.hexdigest()
+
+
+def job_key(distance_matrix, solver_kwargs, seed):
+    """Klíč cache výsledků: hash instance + parametry solveru + seed."""
+    params = ",".join(f"{name}={solver_kwargs[name]!r}" for name in sorted(solver_kwargs))
+    return f"{instance_key(distance_matrix)}|{params}|seed={seed}"
+
+
+class ResultCache(LRUCache):
+    """Omezená LRU cache výsledků řešení (nejlepší cesta a její délka) podle klíče úlohy."""
+
+    def __init__(self, max_size=100):
+        super().__init__(max_size)
+
+
+class SolveJob:
+    """
+    Jedna úloha řešení TSP ve službě. Stejnou úlohu může sdílet více relací
+    (stejná instance, parametry i seed) - výpočet pak běží jen jednou.
+    """
+
+    def __init__(self, job_id, key, n_generations, progress_queue=None, stop_event=None):
+        self.id = job_id
+        self.key = key
+        self.n_generations = n_generations
+        self.status = "queued"
+        self.cached = False  # Výsledek pochází z cache
+        self.subscribers = set()  # Relace, které na výsledek čekají
+        self.progress_queue = progress_queue
+        self.stop_event = stop_event
+        self.submitted_at = time.time()
+        self.generation = 0
+        self.best_distance = None
+        self.best_route = None  # Poslední zlepšená cesta z průběhu
+        self.result = None  # (nejlepší cesta, délka) po dokončení
+        self.error = None
+        self.finished = asyncio.Event()
+
+    def update_progress(self):
+        """Převezme zprávy o průběhu z fronty pracovního procesu (nejnovější stav a poslední zlepšenou cestu)."""
+        if self.progress_queue is None:
+            return
+        while not self.progress_queue.empty():
+            generation, distance, route = self.progress_queue.get_nowait()
+            self.generation, self.best_distance = generation, distance
+            if route is not None:
+                self.best_route = route
+
+    async def wait(self):
+        """Počká na dokončení úlohy a vrátí (nejlepší cesta, délka); při chybě ji vyvolá znovu."""
+        await self.finished.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SolveService:
+    """
+    Sdílená služba pro řešení TSP z více relací najednou: nejvýše 'max_workers' souběžných
+    výpočtů v pracovních procesech, omezená fronta čekajících úloh, stav úloh po relacích
+    a LRU cache výsledků. Stejný požadavek (instance + parametry + seed) se vrátí z cache,
+    nebo se připojí k již běžící úloze.
+    """
+
+    def __init__(self, max_workers=2, max_queue_size=20, cache_size=100, mp_context=None):
+        """
+        Args:
+            max_workers (int): Počet souběžně běžících solverů (pracovních procesů).
+            max_queue_size (int): Kolik úloh smí čekat ve frontě; další požadavky se odmítnou.
+            cache_size (int): Kolik výsledků si pamatovat v cache.
+            mp_context (optional): multiprocessing kontext pro pracovní procesy (výchozí je výchozí kontext platformy).
+        """
+        if max_workers < 1:
+            raise ValueError("Počet pracovních procesů musí být alespoň 1.")
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.cache = ResultCache(cache_size)
+        self._mp_context = mp_context
+        self._executor = None
+        self._manager = None
+        self._slots = None  # asyncio.Semaphore, vytvoří se ve smyčce událostí při prvním požadavku
+        self._waiting = []  # Úlohy ve frontě v pořadí příchodu
+        self._active = {}  # Klíč -> rozpracovaná (čekající nebo běžící) úloha
+        self._sessions = {}  # Relace -> deque posledních úloh
+        self._ids = itertools.count(1)
+
+    def _get_executor(self):
+        """Vrátí (a případně spustí) pool pracovních procesů a Manager pro fronty průběhu."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._mp_context)
+            self._manager = (self._mp_context or multiprocessing).Manager()
+            self._slots = asyncio.Semaphore(self.max_workers)
+        return self._executor
+
+    def submit(self, session_id, distance_matrix, solver_kwargs, seed):
+        """
+        Zařadí úlohu řešení (nebo vrátí výsledek z cache či již rozpracovanou stejnou úlohu).
+
+        Args:
+            session_id (str): Identifikátor relace (uživatele), která úlohu zadává.
+            distance_matrix (DistanceMatrix): Řešená instance.
+            solver_kwargs (dict): Parametry pro TSPGeneticSolver (kromě distance_matrix).
+            seed (int): Seed generátorů náhodných čísel - součást klíče cache.
+
+        Returns:
+            SolveJob: Úloha; na výsledek se čeká přes 'await job.wait()'.
+        """
+        key = job_key(distance_matrix, solver_kwargs, seed)
+        job = self._active.get(key)
+        if job is not None and job.stop_event.is_set():
+            job = None  # Zrušenou úlohu nesdílíme, spustí se nová
+        if job is None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                job = SolveJob(next(self._ids), key, solver_kwargs["n_generations"])
+                job.status, job.cached, job.result = "done", True, cached
+                job.best_route, job.best_distance = cached
+                job.finished.set()
+            else:
+                # Kapacita = běžící výpočty + čekající ve frontě
+                if len(self._active) >= self.max_workers + self.max_queue_size:
+                    raise ServiceBusyError("Server je vytížený, fronta úloh je plná. Zkuste to prosím později.")
+                self._get_executor()
+                job = SolveJob(next(self._ids), key, solver_kwargs["n_generations"],
+                               self._manager.Queue(), self._manager.Event())
+                self._active[key] = job
+                self._waiting.append(job)
+                asyncio.get_running_loop().create_task(self._run(job, distance_matrix, solver_kwargs, seed))
+        job.subscribers.add(session_id)
+        history = self._sessions.setdefault(session_id, deque(maxlen=SESSION_HISTORY))
+        if job not in history:
+            history.append(job)
+        return job
+
+    async def _run(self, job, distance_matrix, solver_kwargs, seed):
+        """Počká na volný pracovní proces, spustí výpočet a uloží výsledek."""
+        try:
+            async with self._slots:
+                if job.finished.is_set():
+                    return  # Zrušena ještě ve frontě (viz cancel)
+                self._waiting.remove(job)
+                job.status = "running"
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, solve_with_progress, distance_matrix, solver_kwargs,
+                    job.progress_queue, job.stop_event, 0.25, seed)
+            job.update_progress()
+            job.result = result
+            if job.stop_event.is_set():
+                job.status = "cancelled"  # Dosud nejlepší cesta, do cache ji neukládáme
+            else:
+                job.status = "done"
+                self.cache.put(job.key, result)
+        except Exception as e:
+            job.status, job.error = "failed", e
+        finally:
+            if job in self._waiting:
+                self._waiting.remove(job)
+            if self._active.get(job.key) is job:
+                self._active.pop(job.key)
+            job.finished.set()
+
+    def cancel(self, job, session_id):
+        """
+        Odhlásí relaci z úlohy; výpočet se zruší, až o výsledek nestojí žádná relace.
+        Úloha, která ještě čeká ve frontě, se ukončí hned a uvolní místo ve frontě.
+        """
+        job.subscribers.discard(session_id)
+        if not job.subscribers and job.stop_event is not None:
+            job.stop_event.set()
+            if job in self._waiting:
+                self._waiting.remove(job)
+                if self._active.get(job.key) is job:
+                    self._active.pop(job.key)
+                job.status, job.result = "cancelled", (None, float('inf'))
+                job.finished.set()
+
+    def forget_session(self, session_id):
+        """Zapomene relaci (např. po zavření stránky) a zruší úlohy, na které už nikdo nečeká."""
+        for job in self._sessions.pop(session_id, ()):
+            if job.status in ("queued", "running"):
+                self.cancel(job, session_id)
+
+    def queue_position(self, job):
+        """Pořadí úlohy ve frontě (od 1), nebo None pokud ve frontě nečeká."""
+        return self._waiting.index(job) + 1 if job in self._waiting else None
+
+    def session_jobs(self, session_id):
+        """Vrátí poslední úlohy relace (od nejstarší)."""
+        return list(self._sessions.get(session_id, ()))
+
+    def stats(self):
+        """Souhrnný stav služby: čekající a běžící úlohy a úspěšnost cache."""
+        return {
+            "queued": len(self._waiting),
+            "running": sum(job.status == "running" for job in self._active.values()),
+            "cache_size": len(self.cache),
+            "cache_hit_rate": self.cache.hit_rate,
+        }
+
+
+_service = None
+
+
+def get_service(**kwargs):
+    """
+    Vrátí sdílenou instanci SolveService (při prvním volání ji vytvoří s parametry kwargs).
+    Modul se importuje jen jednou, takže instanci sdílejí všechny relace aplikace.
+    """
+    global _service
+    if _service is None:
+        _service = SolveService(**kwargs)
+    return _service
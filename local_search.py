@@ -0,0 +1,245 @@
+import math
+import time
+from collections import deque
+
+import numpy as np
+
+from sparse_graph import SparseGraph
+
+# Kolik prvků se najednou zpracuje při hledání nejbližších sousedů - omezuje špičku paměti
+_BLOCK_ELEMENTS = 4_000_000
+
+
+def nearest_neighbor_lists(distance_matrix, k=10):
+    """
+    Pro každé město vrátí indexy jeho k nejbližších měst (seřazené podle vzdálenosti).
+
+    Počítá se ze souřadnic (DistanceMatrix.coordinates); pokud instance souřadnice nemá,
+    použije se uložená matice vzdáleností.
+
+    Args:
+        distance_matrix (DistanceMatrix): Instance, pro kterou se seznamy počítají.
+        k (int): Počet sousedů na město (omezí se na n_cities - 1).
+
+    Returns:
+        np.ndarray: Pole (n_cities, k) s indexy sousedů.
+    """
+    n = distance_matrix.number_of_cities
+    k = min(k, n - 1)
+    coordinates = distance_matrix.coordinates
+    use_coordinates = coordinates is not None
+    neighbors = np.empty((n, k), dtype=np.intp)
+    block_rows = max(1, _BLOCK_ELEMENTS // n)
+    for start in range(0, n, block_rows):
+        end = min(start + block_rows, n)
+        if use_coordinates:
+            diff = coordinates[start:end, np.newaxis, :] - coordinates[np.newaxis, :, :]
+            block = np.einsum('ijk,ijk->ij', diff, diff)
+        else:
+            block = np.array(distance_matrix.distances[start:end], dtype=np.float64)
+        # Město samo sebe mezi sousedy nechceme
+        block[np.arange(end - start), np.arange(start, end)] = np.inf
+        candidates = np.argpartition(block, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(block, candidates, axis=1), axis=1)
+        neighbors[start:end] = np.take_along_axis(candidates, order, axis=1)
+    return neighbors
+
+
+class LocalSearch:
+    """
+    Lokální prohledávání 2-opt a Or-opt nad seznamy kandidátních sousedů s "don't-look" bity.
+
+    Zkoumají se jen hrany k nejbližším sousedům a jen města, v jejichž okolí se cesta
+    nedávno změnila, takže jeden průchod je téměř lineární v počtu měst.
+    Předpokládá symetrické vzdálenosti (2-opt obrací směr úseků cesty).
+    """
+
+    def __init__(self, distance_matrix, n_neighbors=10, use_or_opt=True, max_segment_length=3):
+        """
+        Args:
+            distance_matrix (DistanceMatrix): Matice vzdáleností řešené instance.
+            n_neighbors (int): Počet kandidátních sousedů pro každé město.
+            use_or_opt (bool): Zda kromě 2-opt zkoušet i přesuny úseků (Or-opt).
+            max_segment_length (int): Maximální délka úseku přesouvaného Or-opt tahem.
+        """
+        self.distance_matrix = distance_matrix
+        self.n_cities = distance_matrix.number_of_cities
+        self.use_or_opt = use_or_opt
+        self.max_segment_length = max_segment_length
+        self.n_moves = 0  # Celkový počet provedených zlepšujících tahů
+
+        if isinstance(distance_matrix, SparseGraph):
+            # Řídký graf: kandidáty jsou existující hrany, chybějící hrany mají penalizační délku
+            self.neighbors = distance_matrix.neighbor_lists(n_neighbors)
+            self._dist = distance_matrix.get_distance
+            return
+        self.neighbors = nearest_neighbor_lists(distance_matrix, n_neighbors).tolist()
+
+        # Skalární vzdálenost: z matice, nebo přímo ze souřadnic v režimu bez matice
+        if distance_matrix.distances is not None:
+            matrix = distance_matrix.distances
+            self._dist = lambda a, b: float(matrix[a, b])
+        else:
+            xs, ys = distance_matrix.coordinates[:, 0].tolist(), distance_matrix.coordinates[:, 1].tolist()
+            if distance_matrix.rounding == "nint":
+                self._dist = lambda a, b: math.floor(math.hypot(xs[a] - xs[b], ys[a] - ys[b]) + 0.5)
+            elif distance_matrix.rounding == "ceil":
+                self._dist = lambda a, b: math.ceil(math.hypot(xs[a] - xs[b], ys[a] - ys[b]))
+            else:
+                self._dist = lambda a, b: math.hypot(xs[a] - xs[b], ys[a] - ys[b])
+
+    def improve(self, route, distance=None, deadline=None, max_moves=None):
+        """
+        Vylepšuje cestu 2-opt/Or-opt tahy, dokud existuje zlepšení nebo nevyprší rozpočet.
+
+        Args:
+            route (array-like): Cesta jako permutace indexů měst.
+            distance (float, optional): Známá délka cesty; pokud chybí, spočítá se.
+            deadline (float, optional): Čas (time.perf_counter()), kdy se má prohledávání ukončit.
+            max_moves (int, optional): Maximální počet provedených tahů.
+
+        Returns:
+            tuple: (vylepšená cesta jako np.ndarray, její délka, zda je cesta lokálně optimální -
+                    False, pokud prohledávání ukončil rozpočet dřív, než se vyprázdnila fronta)
+        """
+        tour = [int(city) for city in route]
+        n = len(tour)
+        if distance is None:
+            distance = sum(self._dist(tour[i], tour[(i + 1) % n]) for i in range(n))
+        if n < 5:
+            return np.array(tour, dtype=np.intp), distance, True
+
+        pos = [0] * n
+        for idx, city in enumerate(tour):
+            pos[city] = idx
+
+        # Don't-look bity: ve frontě jsou jen města, u kterých má smysl hledat zlepšení
+        queue = deque(tour)
+        queued = [True] * n
+        moves = 0
+        checks = 0
+        while queue:
+            checks += 1
+            if deadline is not None and checks % 32 == 0 and time.perf_counter() > deadline:
+                break
+            if max_moves is not None and moves >= max_moves:
+                break
+
+            city = queue.popleft()
+            queued[city] = False
+            result = self._try_two_opt(city, tour, pos)
+            if result is None and self.use_or_opt:
+                result = self._try_or_opt(city, tour, pos)
+            if result is None:
+                continue
+
+            gain, touched = result
+            distance -= gain
+            moves += 1
+            for touched_city in touched:
+                if not queued[touched_city]:
+                    queued[touched_city] = True
+                    queue.append(touched_city)
+
+        self.n_moves += moves
+        return np.array(tour, dtype=np.intp), distance, not queue
+
+    def _reverse(self, tour, pos, i, j):
+        """Obrátí úsek cesty od pozice i po pozici j (cyklicky); obrací se kratší ze dvou stran."""
+        n = len(tour)
+        length = (j - i) % n + 1
+        if 2 * length > n:
+            # Obrácení doplňku dává stejnou okružní cestu (jen opačně orientovanou)
+            i, j = (j + 1) % n, (i - 1) % n
+            length = n - length
+        for _ in range(length // 2):
+            a, b = tour[i], tour[j]
+            tour[i], tour[j] = b, a
+            pos[b], pos[a] = i, j
+            i = (i + 1) % n
+            j = (j - 1) % n
+
+    def _try_two_opt(self, a, tour, pos):
+        """Zkusí zlepšující 2-opt tah s hranou vedoucí z města a. Vrací (zisk, dotčená města) nebo None."""
+        n = len(tour)
+        dist = self._dist
+        for forward in (True, False):
+            b = tour[(pos[a] + 1) % n] if forward else tour[pos[a] - 1]
+            d_ab = dist(a, b)
+            for c in self.neighbors[a]:
+                d_ac = dist(a, c)
+                if d_ac >= d_ab:
+                    break  # Sousedé jsou seřazení, dál už zlepšení nenajdeme
+                d = tour[(pos[c] + 1) % n] if forward else tour[pos[c] - 1]
+                if c == b or d == a:
+                    continue
+                gain = d_ab + dist(c, d) - d_ac - dist(b, d)
+                if gain > 1e-9:
+                    if forward:
+                        # ... a b ... c d ... -> ... a c ... b d ...
+                        self._reverse(tour, pos, pos[b], pos[c])
+                    else:
+                        # ... d c ... b a ... -> ... d b ... c a ...
+                        self._reverse(tour, pos, pos[c], pos[b])
+                    return gain, (a, b, c, d)
+        return None
+
+    def _try_or_opt(self, a, tour, pos):
+        """Zkusí přesunout úsek začínající městem a vedle některého z jeho sousedů."""
+        n = len(tour)
+        dist = self._dist
+        for length in range(1, min(self.max_segment_length, n - 3) + 1):
+            start = pos[a]
+            segment = [tour[(start + offset) % n] for offset in range(length)]
+            segment_set = set(segment)
+            e = segment[-1]
+            p = tour[start - 1]
+            nx = tour[(start + length) % n]
+            removal_gain = dist(p, a) + dist(e, nx) - dist(p, nx)
+
+            for c in self.neighbors[a]:
+                d_ca = dist(c, a)
+                if d_ca >= removal_gain:
+                    break
+                if c in segment_set:
+                    continue
+                # Vložení mezi c a jeho následníka (a vedle c), nebo mezi předchůdce c a c (obráceně)
+                c_next = tour[(pos[c] + 1) % n]
+                c_prev = tour[pos[c] - 1]
+                if c_next not in segment_set:
+                    gain = removal_gain - (d_ca + dist(e, c_next) - dist(c, c_next))
+                    if gain > 1e-9:
+                        self._move_segment(tour, pos, p, a, e, nx, c, c_next, reverse=False)
+                        return gain, (p, nx, c, c_next, a, e)
+                if c_prev not in segment_set:
+                    gain = removal_gain - (dist(c_prev, e) + d_ca - dist(c_prev, c))
+                    if gain > 1e-9:
+                        self._move_segment(tour, pos, p, a, e, nx, c_prev, c, reverse=True)
+                        return gain, (p, nx, c_prev, c, a, e)
+        return None
+
+    def _two_opt_move(self, tour, pos, t1, t2, t3):
+        """
+        Odebere hrany (t1, t2) a (t3, t4), kde t4 následuje t3 ve stejném směru průchodu jako t2 po t1,
+        a obrátí cestu t2 ... t3. Funguje pro obě orientace pole 'tour' (_reverse ji může otočit).
+        """
+        if tour[(pos[t1] + 1) % len(tour)] == t2:
+            self._reverse(tour, pos, pos[t2], pos[t3])
+        else:
+            self._reverse(tour, pos, pos[t3], pos[t2])
+
+    def _move_segment(self, tour, pos, p, a, e, nx, after, before, reverse):
+        """
+        Přesune úsek a ... e (ležící mezi p a nx) mezi sousední města 'after' a 'before'.
+        Tah se složí z 2-opt obrácení, každé obrací kratší stranu cesty (viz _reverse).
+        """
+        if reverse:
+            # p a..e nx..after before -> p a..e after..nx before -> p nx..after e..a before
+            self._two_opt_move(tour, pos, e, nx, after)
+            self._two_opt_move(tour, pos, p, a, nx)
+        else:
+            # p a..e nx..after before -> p after..nx e..a before -> p nx..after e..a before
+            #                          -> p nx..after a..e before
+            self._two_opt_move(tour, pos, p, a, after)
+            self._two_opt_move(tour, pos, p, after, nx)
+            self._two_opt_move(tour, pos, after, e, a)
@@ -1,11 +1,53 @@
+import asyncio
 import base64
-from nicegui import ui
+import os
+import random
+import shutil
+import time
+from nicegui import run, ui
 import numpy as np
+import matplotlib.image as mpimg
 import matplotlib.pyplot as plt
 from io import BytesIO
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
 
 from graph_generator import DistanceMatrix
-from solver import TSPGeneticSolver
+from instance_loader import load_instance
+from job_service import ServiceBusyError, get_service
+
+# Jak často (v sekundách) se při běhu obnovují popisky a obrázek průběžné cesty
+PROGRESS_LABEL_INTERVAL = 0.5
+PROGRESS_IMAGE_INTERVAL = 1.0
+
+# Limity vykreslování grafu: popisky měst, vzorek spojů v pozadí a úplné vypnutí spojů
+LABELS_MAX_CITIES = 100
+MAX_BACKGROUND_EDGES = 3000
+BACKGROUND_EDGES_MAX_CITIES = 300
+
+# Služba pro řešení sdílená všemi uživateli: počet souběžných solverů, délka fronty a velikost cache výsledků
+SOLVE_WORKERS = int(os.environ.get("TSP_SOLVE_WORKERS", 2))
+SOLVE_QUEUE_SIZE = int(os.environ.get("TSP_SOLVE_QUEUE_SIZE", 20))
+RESULT_CACHE_SIZE = int(os.environ.get("TSP_RESULT_CACHE_SIZE", 100))
+
+service = get_service(max_workers=SOLVE_WORKERS, max_queue_size=SOLVE_QUEUE_SIZE, cache_size=RESULT_CACHE_SIZE)
+session_id = ui.context.client.id  # Každé otevření stránky je samostatná relace
+current_job = None  # Úloha této relace, na kterou se právě čeká
+cancel_requested = None  # asyncio.Event - relace přestala na úlohu čekat (tlačítko Zrušit)
+
+UPLOAD_DIR = ".tsp_uploads"  # Kam se ukládají nahrané soubory instancí (každá relace má vlastní podadresář)
+session_upload_dir = os.path.join(UPLOAD_DIR, session_id)
+uploaded_instance_path = None  # Cesta k naposledy nahranému souboru (TSPLIB .tsp nebo .csv)
+
+
+def close_session():
+    """Po zavření stránky zruší úlohy relace a smaže její nahrané soubory."""
+    service.forget_session(session_id)
+    shutil.rmtree(session_upload_dir, ignore_errors=True)
+
+
+ui.context.client.on_delete(close_session)
 
 # UI
 with ui.row().style("width: 100%; align-items: flex-start;"):
@@ -15,20 +57,143 @@ with ui.row().style("width: 100%; align-items: flex-start;"):
         n_cities = ui.number("Počet měst", value=10, min=2, max=1000).style("width: 100%").bind_visibility_from(generate_check, 'value')
         min_dist = ui.number("Min. vzdálenost", value=50, min=1, max=2000).style("width: 100%").bind_visibility_from(generate_check, 'value')
         max_dist = ui.number("Max. vzdálenost", value=2000, min=1, max=10000).style("width: 100%").bind_visibility_from(generate_check, 'value')
-        file_input = ui.upload(label="Vložit soubor", on_upload=lambda e: ui.notify("Soubor nahrán!")).style("width: 90%")
+        seed_input = ui.number("Seed (prázdné = náhodný)", value=None, min=0, format="%d").style("width: 100%")
+        file_input = ui.upload(label="Vložit soubor (.tsp, .csv)", on_upload=lambda e: handle_upload(e)).style("width: 90%")
         solve_button = ui.button("Vyřeš", on_click=lambda: solve_tsp())
+        cancel_button = ui.button("Zrušit", on_click=lambda: cancel_solve(), color='negative')
+        cancel_button.disable()
         n_generations = ui.number("Počet generací", value= 200, min=1,max=2000).style("width: 100%")
         populationlen = ui.number("Velikost generace", value=100, min=1, max=2000).style("width: 100%")
         mutation_rate = ui.number("Míra mutace", value=0.1, min=0.05, max=0.5,step=0.05).style("width: 100%")
+        time_limit = ui.number("Časový limit [s] (0 = bez limitu)", value=0, min=0).style("width: 100%")
+        stall_generations = ui.number("Konec po generacích bez zlepšení (0 = vypnuto)", value=0, min=0).style("width: 100%")
+        seeding_select = ui.select({"nearest_neighbor": "Nejbližší soused", "greedy": "Hladové hrany", "hilbert": "Hilbertova křivka"},
+                                   value=[], multiple=True, label="Počáteční populace z heuristik").style("width: 100%")
+        crossover_select = ui.select({"ox": "Order Crossover (OX1)", "erx": "Edge Recombination (ERX)", "eax": "Edge Assembly (EAX)"},
+                                     value="ox", label="Křížení").style("width: 100%")
+        mutation_select = ui.select({"swap": "Prohození měst", "inversion": "Inverze úseku (2-opt)"},
+                                    value="swap", label="Mutace").style("width: 100%")
+        adaptive_select = ui.select({None: "Bez adaptace", "mutation": "Zvyšovat mutaci", "immigrants": "Přidávat nové jedince"},
+                                    value=None, label="Při ztrátě diverzity").style("width: 100%")
     with ui.column().style("flex-grow: 1; padding-left: 20px;"):
         result_label = ui.label("Výsledky se zobrazí zde.")  # Místo pro textový výstup
         route_label = ui.label()
         distance_label = ui.label()
+        jobs_label = ui.label().style("color: gray; font-size: 12px;")
         image_display = ui.image().style("max-width: 100%; border: 1px solid lightgray;")
 
+class RoutePlot:
+    """
+    Graf instance s předem vykreslenou statickou vrstvou (města, spoje, osy).
+    Při překreslení nové cesty se obnoví uložené pozadí a vykreslí se jen samotná cesta.
+    """
+
+    def __init__(self, coordinates, title="TSP - Nejlepší cesta"):
+        """
+        Args:
+            coordinates (np.ndarray): Pole (n_cities, 2) se souřadnicemi (x, y).
+            title (str): Název grafu.
+        """
+        self.coordinates = coordinates
+        self.title = title
+        num_cities = coordinates.shape[0]
+        x_coords = coordinates[:, 0]
+        y_coords = coordinates[:, 1]
+
+        style = 'seaborn-v0_8-darkgrid'
+        if style not in plt.style.available:
+            print(f"Styl '{style}' není dostupný, používá se výchozí.")
+            style = 'default'
+
+        with plt.style.context(style):
+            # Samostatná Figure (bez pyplot) - nezasahuje do globálního stavu matplotlibu
+            self.figure = Figure(figsize=(8, 8))
+            self.canvas = FigureCanvasAgg(self.figure)
+            ax = self.figure.add_subplot()
+
+            # Spoje mezi městy jako jedna LineCollection; u větších instancí jen náhodný vzorek, u velkých vůbec
+            edges = self._background_edges(num_cities)
+            if len(edges):
+                label_all = 'Všechny možné spoje' if len(edges) == num_cities * (num_cities - 1) // 2 \
+                    else 'Vzorek možných spojů'
+                ax.add_collection(LineCollection(coordinates[edges], colors='gray', linestyles=':',
+                                                 linewidths=0.7, zorder=1, label=label_all))
+
+            # 1. Vykreslení měst (jako body), velikost bodů se zmenšuje s počtem měst
+            marker_size = 150 if num_cities <= LABELS_MAX_CITIES else max(2.0, 3000 / num_cities)
+            ax.scatter(x_coords, y_coords, c='dodgerblue', s=marker_size, zorder=5, label='Města')
+
+            # 2. Přidání čísel k městům (jen u malých instancí, jinak jsou nečitelná)
+            if num_cities <= LABELS_MAX_CITIES:
+                for i in range(num_cities):
+                    ax.text(x_coords[i], y_coords[i] + 0.01 * (y_coords.max() - y_coords.min()),
+                            str(i), fontsize=10, color='black', zorder=6, ha='center', va='bottom',
+                            bbox=dict(boxstyle='round,pad=0.2', fc='yellow', alpha=0.3, ec='none'))  # Žluté pozadí pro čísla
+
+            # 3. Čára cesty - "animated" artist se nevykresluje do statického pozadí
+            self.route_line, = ax.plot([], [], 'r-', linewidth=2.5 if num_cities <= LABELS_MAX_CITIES else 1.0,
+                                       label='Nejlepší cesta', zorder=4, animated=True)
+
+            # Nastavení grafu (titulek, popisky os, legenda, mřížka, poměr stran)
+            ax.set_title(title, fontsize=16)
+            ax.set_xlabel("X souřadnice", fontsize=12)
+            ax.set_ylabel("Y souřadnice", fontsize=12)
+            ax.legend(loc='upper right')  # Legenda se zobrazí pro prvky, které mají 'label'
+            ax.grid(True, linestyle='--', alpha=0.6, zorder=0)  # Mřížka úplně vespod
+
+            # Nastavení rozsahu os pro lepší zobrazení
+            padding_x = (x_coords.max() - x_coords.min()) * 0.05  # 5% okraj
+            padding_y = (y_coords.max() - y_coords.min()) * 0.05
+            ax.set_xlim(x_coords.min() - padding_x, x_coords.max() + padding_x)
+            ax.set_ylim(y_coords.min() - padding_y, y_coords.max() + padding_y)
+            ax.set_aspect('equal', adjustable='box')  # Zajistí stejné měřítko os
+            self.figure.tight_layout()
+
+        self.ax = ax
+        self.canvas.draw()
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+
+    @staticmethod
+    def _background_edges(num_cities):
+        """Vrátí pole dvojic indexů měst (k, 2) pro vrstvu spojů v pozadí."""
+        if num_cities > BACKGROUND_EDGES_MAX_CITIES:
+            return np.empty((0, 2), dtype=np.intp)
+        first, second = np.triu_indices(num_cities, k=1)
+        edges = np.column_stack((first, second))
+        if len(edges) > MAX_BACKGROUND_EDGES:
+            # Vlastní generátor se seedem: vzorek je stabilní a neovlivní globální np.random solveru
+            rng = np.random.default_rng(0)
+            edges = edges[rng.choice(len(edges), MAX_BACKGROUND_EDGES, replace=False)]
+        return edges
+
+    def render(self, route):
+        """
+        Vykreslí cestu přes uložené pozadí.
+
+        Returns:
+            str: Data URI (base64) PNG obrázku.
+        """
+        self.canvas.restore_region(self._background)
+        if route:
+            closed_route = np.append(np.asarray(route), route[0])  # Návrat do startovního města
+            self.route_line.set_data(self.coordinates[closed_route, 0], self.coordinates[closed_route, 1])
+            self.ax.draw_artist(self.route_line)
+            self.ax.draw_artist(self.ax.get_legend())  # Legenda zůstane nad cestou
+
+        buf = BytesIO()
+        mpimg.imsave(buf, np.asarray(self.canvas.buffer_rgba()), format='png')
+        buf.seek(0)
+        img_str = base64.b64encode(buf.read()).decode('utf-8')
+        return f"data:image/png;base64,{img_str}"
+
+
+_route_plot = None  # Poslední vytvořený RoutePlot (statická vrstva se znovu použije pro stejná města)
+
+
 def plot_tsp_route(coordinates, route, title="TSP - Nejlepší cesta"):
     """
-    Vykreslí města, všechny možné spoje (nevýrazně) a nejlepší nalezenou cestu.
+    Vykreslí města, možné spoje (nevýrazně) a nejlepší nalezenou cestu.
+    Statická vrstva se pro stejné souřadnice vykresluje jen jednou, další volání kreslí jen cestu.
 
     Args:
         coordinates (np.ndarray): Pole (n_cities, 2) se souřadnicemi (x, y).
@@ -38,6 +203,7 @@ def plot_tsp_route(coordinates, route, title="TSP - Nejlepší cesta"):
     Returns:
         str: Data URI (base64) PNG obrázku, nebo None pokud nastane chyba.
     """
+    global _route_plot
     if coordinates is None or coordinates.shape[0] < 2 :
         print("Chyba: Chybí nebo jsou nedostatečné souřadnice pro vykreslení.")
         return None
@@ -50,89 +216,80 @@ def plot_tsp_route(coordinates, route, title="TSP - Nejlepší cesta"):
          route = None #
 
     try:
-        try:
-            plt.style.use('seaborn-v0_8-darkgrid')
-        except OSError:
-             print("Styl 'seaborn-v0_8-darkgrid' není dostupný, používá se výchozí.")
+        if _route_plot is None or _route_plot.coordinates is not coordinates or _route_plot.title != title:
+            _route_plot = RoutePlot(coordinates, title)
+        data_uri = _route_plot.render(route)
+        print("Obrázek grafu úspěšně vygenerován do paměti.")
+        return data_uri
 
-        fig, ax = plt.subplots(figsize=(8, 8))
+    except Exception as e:
+        print(f"Chyba při generování grafu: {e}")
+        _route_plot = None
+        return None
 
-        x_coords = coordinates[:, 0]
-        y_coords = coordinates[:, 1]
 
-        # Vykreslení všech možných spojů
-        added_legend_all = False # Pomocná proměnná pro přidání legendy jen jednou
-        for i in range(num_cities):
-            for j in range(i + 1, num_cities): # Iterujeme přes všechny unikátní páry měst
-                label_all = 'Všechny možné spoje' if not added_legend_all else None
-                ax.plot([x_coords[i], x_coords[j]], # X souřadnice [start, end]
-                        [y_coords[i], y_coords[j]], # Y souřadnice [start, end]
-                        color='gray',
-                        linestyle=':',
-                        linewidth=0.7,
-                        alpha=1,
-                        zorder=1,
-                        label=label_all)
-                if not added_legend_all:
-                    added_legend_all = True
-
-        # 1. Vykreslení měst (jako body)
-        ax.scatter(x_coords, y_coords, c='dodgerblue', s=150, zorder=5, label='Města')
-
-        # 2. Přidání čísel k městům
-        for i in range(num_cities):
-            ax.text(x_coords[i], y_coords[i] + 0.01 * (coordinates[:,1].max() - coordinates[:,1].min()),
-                    str(i), fontsize=10, color='black', zorder=6, ha='center', va='bottom',
-                    bbox=dict(boxstyle='round,pad=0.2', fc='yellow', alpha=0.3, ec='none')) # Žluté pozadí pro čísla
-
-        # 3. Vykreslení nejlepší cesty (pokud existuje)
-        if route:
-            route_x = [coordinates[city_index][0] for city_index in route]
-            route_y = [coordinates[city_index][1] for city_index in route]
-            # Přidáme startovní město na konec pro uzavření smyčky
-            route_x.append(coordinates[route[0]][0])
-            route_y.append(coordinates[route[0]][1])
-
-            ax.plot(route_x, route_y, 'r-', linewidth=2.5, label='Nejlepší cesta', zorder=4) # Červená čára
-
-        # Nastavení grafu (titulek, popisky os, legenda, mřížka, poměr stran)
-        ax.set_title(title, fontsize=16)
-        ax.set_xlabel("X souřadnice", fontsize=12)
-        ax.set_ylabel("Y souřadnice", fontsize=12)
-        ax.legend() # Legenda se zobrazí pro prvky, které mají 'label'
-        ax.grid(True, linestyle='--', alpha=0.6, zorder=0) # Mřížka úplně vespod
-
-        # Nastavení rozsahu os pro lepší zobrazení
-        padding_x = (x_coords.max() - x_coords.min()) * 0.05 # 5% okraj
-        padding_y = (y_coords.max() - y_coords.min()) * 0.05
-        ax.set_xlim(x_coords.min() - padding_x, x_coords.max() + padding_x)
-        ax.set_ylim(y_coords.min() - padding_y, y_coords.max() + padding_y)
-        ax.set_aspect('equal', adjustable='box') # Zajistí stejné měřítko os
-
-        # Uložení obrázku do paměti (BytesIO)
-        buf = BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight')
-        buf.seek(0)
+async def handle_upload(e):
+    """Uloží nahraný soubor instance na disk; načte se až při řešení."""
+    global uploaded_instance_path
+    # Vlastní adresář relace - stejně pojmenované soubory jiných uživatelů se nepřepíšou
+    os.makedirs(session_upload_dir, exist_ok=True)
+    path = os.path.join(session_upload_dir, os.path.basename(e.file.name))
+    await e.file.save(path)
+    uploaded_instance_path = path
+    ui.notify(f"Soubor {e.file.name} nahrán!")
 
-        # Převod na base64 Data URI
-        img_str = base64.b64encode(buf.read()).decode('utf-8')
-        data_uri = f"data:image/png;base64,{img_str}"
 
-        plt.close(fig) # Zavřeme plot
-        print("Obrázek grafu (včetně všech spojů) úspěšně vygenerován do paměti.")
-        return data_uri
+def cancel_solve():
+    """
+    Odhlásí relaci z aktuální úlohy; výpočet se ukončí (a vrátí dosud nejlepší cestu),
+    pokud na něj nečeká jiná relace.
+    """
+    if current_job is not None:
+        service.cancel(current_job, session_id)
+        cancel_requested.set()
+        result_label.set_text("Ukončování výpočtu...")
 
-    except Exception as e:
-        print(f"Chyba při generování grafu: {e}")
-        # zavření plot i v případě chyby
-        if 'fig' in locals():
-            plt.close(fig)
-        return None
+
+_JOB_STATUS_LABELS = {"queued": "ve frontě", "running": "běží", "done": "hotovo",
+                      "cancelled": "zrušeno", "failed": "chyba"}
+
+
+def show_session_jobs():
+    """Vypíše stav posledních úloh této relace."""
+    jobs = service.session_jobs(session_id)
+    jobs_label.set_text("Úlohy: " + ", ".join(
+        f"#{job.id} {_JOB_STATUS_LABELS[job.status]}" + (" (z cache)" if job.cached else "")
+        for job in jobs[-5:]) if jobs else "")
+
+
+async def wait_for_result(job, cancel_event):
+    """
+    Počká na výsledek úlohy, nebo na zrušení touto relací. Pokud úlohu po zrušení dál počítá
+    jiná relace, nečeká se na její konec a vrátí se dosud nejlepší cesta z průběhu.
+
+    Returns:
+        tuple: (nejlepší cesta, délka, zda byla úloha pro tuto relaci zrušena)
+    """
+    finished = asyncio.ensure_future(job.finished.wait())
+    cancelled = asyncio.ensure_future(cancel_event.wait())
+    await asyncio.wait((finished, cancelled), return_when=asyncio.FIRST_COMPLETED)
+    finished.cancel()
+    cancelled.cancel()
+    if cancel_event.is_set() and job.subscribers and not job.finished.is_set():
+        job.update_progress()
+        return job.best_route, job.best_distance, True
+    best_route, best_distance = await job.wait()  # Bez dalších relací se výpočet sám brzy ukončí
+    return best_route, best_distance, cancel_event.is_set() or job.status == "cancelled"
 
 
 # Funkce pro řešení problému
-def solve_tsp():
+async def solve_tsp():
+    global current_job, cancel_requested
+    progress_timer = None
     try:
+        # Seed určuje vygenerovanou instanci i průběh GA - stejný seed a parametry vrátí výsledek z cache
+        seed = int(seed_input.value) if seed_input.value is not None else random.randrange(2**31)
+
         # 1. Získání matice vzdáleností
         distance_matrix = None  # Inicializace
         if generate_check.value:
@@ -143,6 +300,7 @@ def solve_tsp():
                 ui.notify("Počet měst musí být alespoň 2.", type='warning')
                 return
 
+            np.random.seed(seed)
             distance_matrix = DistanceMatrix(
                 number_of_cities=num_cities,
                 coord_range_max=max_d
@@ -150,11 +308,14 @@ def solve_tsp():
             print("Vygenerovaná matice vzdáleností:")
             distance_matrix.print_matrix()
         else:
-            # TODO: logika pro načtení distance_matrix z file_input
-            ui.notify("Načítání ze souboru ještě není implementováno.", type='warning')
-            print("Načítání ze souboru není implementováno.")
-            result_label.set_text("Chyba: Načítání ze souboru není implementováno.")
-            return
+            if uploaded_instance_path is None:
+                ui.notify("Nejdříve nahrajte soubor s instancí (.tsp nebo .csv).", type='warning')
+                result_label.set_text("Chyba: Není nahrán žádný soubor.")
+                return
+            # Načtení (případně z cache matic) v jiném vlákně, aby neblokovalo UI
+            result_label.set_text("Načítání instance ze souboru...")
+            distance_matrix = await run.io_bound(load_instance, uploaded_instance_path)
+            print(f"Načtena instance {uploaded_instance_path} ({distance_matrix.number_of_cities} měst).")
 
         # Kontrola, zda máme platnou matici
         if distance_matrix is None:
@@ -173,19 +334,64 @@ def solve_tsp():
             return
         # Můžete přidat i kontrolu pro mutation_rate, i když je to float
 
-        solver = TSPGeneticSolver(
-            distance_matrix=distance_matrix,
+        solver_kwargs = dict(
             population_size=pop_size,
             mutation_rate=mutation_rate.value,  # mutation_rate může být float
-            n_generations=num_gens
+            n_generations=num_gens,
             # elite_size a tournament_size mají výchozí hodnoty v solveru
+            time_limit=float(time_limit.value) if time_limit.value else None,
+            stall_generations=int(stall_generations.value) if stall_generations.value else None,
+            adaptive=adaptive_select.value,
+            seeding=tuple(seeding_select.value or ()),
+            crossover=crossover_select.value,
+            mutation=mutation_select.value,
         )
 
-        # 3. Spuštění řešení
-        print("Spouštění genetického algoritmu...")
-        result_label.set_text("Probíhá výpočet...")
-        # TODO: spustit v jiném threadu
-        best_route, best_distance = solver.solve()
+        # 3. Zadání úlohy sdílené službě (fronta, pracovní procesy, cache), UI mezitím zůstává responzivní
+        print(f"Zadání úlohy genetického algoritmu (seed {seed})...")
+        try:
+            current_job = service.submit(session_id, distance_matrix, solver_kwargs, seed)
+            cancel_requested = asyncio.Event()
+        except ServiceBusyError as e:
+            ui.notify(str(e), type='warning')
+            result_label.set_text(str(e))
+            return
+        coords = distance_matrix.get_coordinates()
+        last_image_update = 0.0
+        shown_route = None
+
+        def show_progress():
+            # Stav úlohy: pořadí ve frontě, nebo nejnovější generace a poslední zlepšená cesta
+            nonlocal last_image_update, shown_route
+            show_session_jobs()
+            job = current_job
+            if job.status == "queued":
+                result_label.set_text(f"Úloha čeká ve frontě (pořadí {service.queue_position(job)}).")
+                return
+            job.update_progress()
+            if job.status != "running" or job.best_distance is None:
+                return
+            result_label.set_text(f"Probíhá výpočet... generace {job.generation}/{num_gens}")
+            distance_label.set_text(f"Dosud nejlepší vzdálenost: {job.best_distance:.2f}")
+            now = time.monotonic()
+            if (coords is not None and job.best_route is not None and job.best_route is not shown_route
+                    and now - last_image_update >= PROGRESS_IMAGE_INTERVAL):
+                image_data_uri = plot_tsp_route(coords, job.best_route)
+                if image_data_uri:
+                    image_display.set_source(image_data_uri)
+                last_image_update = now
+                shown_route = job.best_route
+
+        solve_button.disable()
+        cancel_button.enable()
+        if not current_job.finished.is_set():
+            result_label.set_text("Probíhá výpočet...")
+            progress_timer = ui.timer(PROGRESS_LABEL_INTERVAL, show_progress)
+        best_route, best_distance, cancelled = await wait_for_result(current_job, cancel_requested)
+        if progress_timer is not None:
+            progress_timer.cancel()
+            progress_timer = None
+        show_session_jobs()
 
         # 4. Zobrazení výsledků
         print("Řešení dokončeno.")
@@ -193,18 +399,28 @@ def solve_tsp():
         if best_route:
             print(f"Nejlepší cesta: {best_route}")
             print(f"Nejlepší vzdálenost: {best_distance}")
-            result_label.set_text("Výpočet dokončen.")
+            if cancelled:
+                result_label.set_text("Výpočet zrušen, zobrazena dosud nejlepší cesta.")
+            elif current_job.cached:
+                result_label.set_text(f"Výsledek převzat z cache (seed {seed}).")
+            else:
+                result_label.set_text(f"Výpočet dokončen (seed {seed}).")
             route_label.set_text(f"Nejlepší nalezená cesta: {best_route}")
             distance_label.set_text(f"Celková vzdálenost: {best_distance:.2f}")
             ui.notify(f"Nalezena cesta s délkou {best_distance:.2f}!", type='positive')
             # VYKRESLENÍ A ZOBRAZENÍ GRAFU
-            coords = distance_matrix.get_coordinates()
-            image_data_uri = plot_tsp_route(coords, best_route)
-            if image_data_uri:
+            image_data_uri = plot_tsp_route(coords, best_route) if coords is not None else None
+            if coords is None:
+                image_display.set_source('')  # Explicitní instance bez souřadnic nelze vykreslit
+            elif image_data_uri:
                 image_display.set_source(image_data_uri)
             else:
                 image_display.set_source('')  # Vymaže obrázek, pokud se nepovedl
                 ui.notify("Nepodařilo se vygenerovat obrázek grafu.", type='warning')
+        elif cancelled:
+            print("Výpočet zrušen před nalezením první cesty.")
+            result_label.set_text("Výpočet zrušen.")
+            image_display.set_source('')
         else:
             print("Nepodařilo se nalézt řešení.")
             result_label.set_text("Nepodařilo se nalézt řešení.")
@@ -227,5 +443,11 @@ def solve_tsp():
         ui.notify(f"Neočekávaná chyba ({error_type}): {e}", type='negative')
         result_label.set_text(f"Neočekávaná chyba: {e}")
         image_display.set_source('')
+    finally:
+        if progress_timer is not None:
+            progress_timer.cancel()
+        current_job = None
+        solve_button.enable()
+        cancel_button.disable()
 
 ui.run(title="TSP Vizualizace")
\ No newline at end of file
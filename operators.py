@@ -0,0 +1,274 @@
+import random
+
+import numpy as np
+
+from local_search import nearest_neighbor_lists
+from sparse_graph import SparseGraph
+
+# Registry genetických operátorů podle jména (viz TSPGeneticSolver, parametry 'crossover' a 'mutation').
+# Křížení: funkce(solver, parents1, parents2, out=None) -> pole potomků (k, n_cities);
+#          pokud je zadané 'out', potomci se zapíší do něj.
+# Mutace: funkce(solver, route, distance) -> nová délka cesty; cestu upravuje v místě.
+CROSSOVERS = {}
+MUTATIONS = {}
+
+
+def register_crossover(name):
+    """Dekorátor, který zaregistruje funkci křížení pod jménem 'name'."""
+    def decorator(function):
+        CROSSOVERS[name] = function
+        return function
+    return decorator
+
+
+def register_mutation(name):
+    """Dekorátor, který zaregistruje funkci mutace pod jménem 'name'."""
+    def decorator(function):
+        MUTATIONS[name] = function
+        return function
+    return decorator
+
+
+def adjacency_tables(routes):
+    """
+    Vrátí tabulky sousedů pro pole cest: pro každou cestu a město jeho následníka a předchůdce.
+
+    Args:
+        routes (np.ndarray): Pole (k, n_cities) cest.
+
+    Returns:
+        np.ndarray: Pole (k, n_cities, 2) - [..., 0] následník, [..., 1] předchůdce.
+    """
+    routes = np.asarray(routes, dtype=np.intp)
+    rows = np.arange(routes.shape[0])[:, np.newaxis]
+    table = np.empty(routes.shape + (2,), dtype=np.intp)
+    table[rows, routes, 0] = np.roll(routes, -1, axis=1)
+    table[rows, routes, 1] = np.roll(routes, 1, axis=1)
+    return table
+
+
+def candidate_lists(solver, k=10):
+    """Seznamy kandidátních sousedů (nejbližší města, v řídkém grafu hrany); počítají se jednou na solver."""
+    if solver._candidate_lists is None:
+        if solver.local_search is not None:
+            solver._candidate_lists = solver.local_search.neighbors
+        elif isinstance(solver.distance_matrix, SparseGraph):
+            solver._candidate_lists = solver.distance_matrix.neighbor_lists(k)
+        else:
+            solver._candidate_lists = nearest_neighbor_lists(solver.distance_matrix, k).tolist()
+    return solver._candidate_lists
+
+
+@register_crossover("ox")
+def order_crossover(solver, parents1, parents2, out=None):
+    """Order Crossover (OX1) - zachovává relativní pořadí měst z druhého rodiče."""
+    return solver._order_crossover_batch(parents1, parents2, out=out)
+
+
+@register_crossover("erx")
+def edge_recombination_crossover(solver, parents1, parents2, out=None):
+    """
+    Edge Recombination (ERX): potomek vzniká skoro jen z hran obou rodičů. Z aktuálního města
+    se pokračuje do souseda (v některém z rodičů), který má nejméně zbývajících sousedů;
+    jen když žádný nezbývá, skočí se do náhodného nenavštíveného města.
+    """
+    parents1 = np.asarray(parents1, dtype=np.intp)
+    tables = np.concatenate([adjacency_tables(parents1), adjacency_tables(parents2)], axis=2)
+    children = np.empty_like(parents1) if out is None else out
+    n = solver.n_cities
+    for child_idx in range(len(parents1)):
+        neighbors = [set(row) for row in tables[child_idx].tolist()]
+        visited = [False] * n
+        # Náhodné pořadí měst pro skoky ze slepé uličky (navštívená se přeskakují)
+        jumps = np.random.permutation(n).tolist()
+        city = int(parents1[child_idx, 0])
+        for step in range(n):
+            children[child_idx, step] = city
+            visited[city] = True
+            for other in neighbors[city]:
+                neighbors[other].discard(city)
+            candidates = neighbors[city]
+            if len(candidates) == 1:
+                city = next(iter(candidates))
+            elif candidates:
+                fewest = min(len(neighbors[other]) for other in candidates)
+                city = random.choice(sorted(other for other in candidates if len(neighbors[other]) == fewest))
+            elif step < n - 1:
+                while visited[jumps[-1]]:
+                    jumps.pop()
+                city = jumps.pop()
+    return children
+
+
+@register_crossover("eax")
+def edge_assembly_crossover(solver, parents1, parents2, out=None):
+    """
+    Zjednodušené Edge Assembly Crossover (EAX s jedním AB-cyklem): v grafu hran, které mají
+    rodiče rozdílné, se najde jeden AB-cyklus (střídavě hrana A a hrana B), v cestě A se jeho
+    hrany A nahradí hranami B a vzniklé podcykly se hladově spojí přes kandidátní sousedy
+    (nejlevnější výměna dvou hran mezi nejmenším podcyklem a zbytkem).
+    """
+    parents1 = np.asarray(parents1, dtype=np.intp)
+    tables1 = adjacency_tables(parents1)
+    tables2 = adjacency_tables(parents2)
+    if out is None:
+        children = parents1.copy()
+    else:
+        children = out
+        children[...] = parents1
+    if solver.n_cities < 5:
+        return children
+    candidates = candidate_lists(solver)
+    for child_idx in range(len(parents1)):
+        cycle = _find_ab_cycle(tables1[child_idx], tables2[child_idx])
+        if cycle is None:
+            continue  # Rodiče jsou stejné cesty (nebo se cyklus nenašel)
+        adjacency = tables1[child_idx].tolist()
+        for (a, b), from_a in cycle:
+            if from_a:
+                _replace_neighbor(adjacency, a, b, None)
+                _replace_neighbor(adjacency, b, a, None)
+        for (a, b), from_a in cycle:
+            if not from_a:
+                _replace_neighbor(adjacency, a, None, b)
+                _replace_neighbor(adjacency, b, None, a)
+        _merge_subtours(solver, adjacency, candidates)
+        children[child_idx] = _walk_cycle(adjacency, 0)
+    return children
+
+
+def _find_ab_cycle(adjacency_a, adjacency_b):
+    """
+    Najde jeden AB-cyklus náhodnou procházkou po hranách, ve kterých se rodiče liší.
+
+    Returns:
+        list: Hrany cyklu jako ((a, b), je_z_A), nebo None.
+    """
+    # Nesdílené hrany A a B pro každé město (hrana je sdílená, pokud ji má město v obou tabulkách)
+    only_a = (adjacency_a[:, :, np.newaxis] != adjacency_b[:, np.newaxis, :]).all(axis=2)
+    only_b = (adjacency_b[:, :, np.newaxis] != adjacency_a[:, np.newaxis, :]).all(axis=2)
+    starts = np.flatnonzero(only_a.any(axis=1))
+    if not len(starts):
+        return None
+    remaining = [{}, {}]  # Jen města s nesdílenými hranami: město -> seznam sousedů
+    for edge_type, (adjacency, only) in enumerate(((adjacency_a, only_a), (adjacency_b, only_b))):
+        for city in np.flatnonzero(only.any(axis=1)).tolist():
+            remaining[edge_type][city] = [other for other, keep in zip(adjacency[city].tolist(), only[city]) if keep]
+
+    city = int(starts[random.randrange(len(starts))])
+    path = [city]
+    departures = {}  # Město -> [(pozice v cestě, typ hrany, kterou z něj cesta odešla)]
+    edge_type = 0  # 0 = hrana z A, 1 = hrana z B; typy se střídají
+    while True:
+        options = remaining[edge_type].get(city)
+        if not options:
+            return None
+        following = options[random.randrange(len(options))]
+        options.remove(following)
+        remaining[edge_type][following].remove(city)
+        departures.setdefault(city, []).append((len(path) - 1, edge_type))
+        path.append(following)
+        # Cyklus se uzavře, když se vrátíme do města, ze kterého jsme odešli hranou opačného typu
+        for position, departure_type in departures.get(following, ()):
+            if departure_type != edge_type:
+                # Hrana na pozici idx má typ idx % 2 (procházka začala hranou z A)
+                return [((path[idx], path[idx + 1]), idx % 2 == 0) for idx in range(position, len(path) - 1)]
+        city = following
+        edge_type = 1 - edge_type
+
+
+def _replace_neighbor(adjacency, city, old, new):
+    """V seznamu sousedů města nahradí první výskyt 'old' hodnotou 'new'."""
+    neighbors = adjacency[city]
+    neighbors[neighbors.index(old)] = new
+
+
+def _walk_cycle(adjacency, start):
+    """Projde cyklus daný seznamy sousedů (každé město má dva) od města 'start' a vrátí pole měst."""
+    route = [start]
+    previous, city = start, adjacency[start][0]
+    while city != start:
+        route.append(city)
+        first, second = adjacency[city]
+        previous, city = city, (second if first == previous else first)
+    return np.array(route, dtype=np.intp)
+
+
+def _merge_subtours(solver, adjacency, candidates):
+    """Hladově spojuje podcykly (nejmenší s některým jiným), dokud nezbude jediný cyklus."""
+    n = len(adjacency)
+    component = np.full(n, -1, dtype=np.intp)
+    subtours = []
+    for city in range(n):
+        if component[city] < 0:
+            subtour = _walk_cycle(adjacency, city)
+            component[subtour] = len(subtours)
+            subtours.append(subtour)
+
+    distance_matrix = solver.distance_matrix
+    alive = set(range(len(subtours)))
+    while len(alive) > 1:
+        smallest = min(alive, key=lambda idx: len(subtours[idx]))
+        cities = subtours[smallest]
+        successors = np.roll(cities, -1)
+
+        # Kandidátní dvojice (c, d): c v nejmenším podcyklu, d v jiném
+        sources = np.repeat(np.arange(len(cities)), [len(candidates[city]) for city in cities.tolist()])
+        targets = np.array([other for city in cities.tolist() for other in candidates[city]], dtype=np.intp)
+        outside = component[targets] != smallest if len(targets) else np.zeros(0, dtype=bool)
+        sources, targets = sources[outside], targets[outside]
+        if not len(targets):
+            # Žádný kandidát mimo podcyklus - spojíme s náhodným městem jiného podcyklu
+            sources = np.zeros(1, dtype=np.intp)
+            targets = np.array([random.choice(np.flatnonzero(component != smallest).tolist())], dtype=np.intp)
+
+        c, c_next = cities[sources], successors[sources]
+        d = targets
+        d_next = np.array([adjacency[city][0] for city in d.tolist()], dtype=np.intp)
+        removed = distance_matrix.get_distances(c, c_next) + distance_matrix.get_distances(d, d_next)
+        # Dvě možnosti propojení: (c-d, c_next-d_next) nebo (c-d_next, c_next-d)
+        straight = distance_matrix.get_distances(c, d) + distance_matrix.get_distances(c_next, d_next) - removed
+        crossed = distance_matrix.get_distances(c, d_next) + distance_matrix.get_distances(c_next, d) - removed
+        best = int(np.argmin(np.minimum(straight, crossed)))
+        c, c_next, d, d_next = int(c[best]), int(c_next[best]), int(d[best]), int(d_next[best])
+        if straight[best] > crossed[best]:
+            d, d_next = d_next, d
+
+        _replace_neighbor(adjacency, c, c_next, d)
+        _replace_neighbor(adjacency, c_next, c, d_next)
+        _replace_neighbor(adjacency, d, d_next, c)
+        _replace_neighbor(adjacency, d_next, d, c_next)
+
+        other = int(component[d])
+        alive.discard(smallest)
+        merged = _walk_cycle(adjacency, c)
+        component[merged] = other
+        subtours[other] = merged
+
+
+@register_mutation("swap")
+def swap_mutation(solver, route, distance):
+    """Prohození dvou náhodných měst (s pravděpodobností mutation_rate), délka se aktualizuje v O(1)."""
+    return solver._swap_mutation_with_delta(route, distance)
+
+
+@register_mutation("inversion")
+def inversion_mutation(solver, route, distance):
+    """
+    Inverze (2-opt tah): s pravděpodobností mutation_rate se obrátí náhodný úsek cesty.
+    Změní se jen dvě hrany, délka se aktualizuje v O(1). Předpokládá symetrické vzdálenosti.
+    """
+    if random.random() >= solver.mutation_rate:
+        return distance
+    n = solver.n_cities
+    i, j = sorted(random.sample(range(n), 2))
+    if i == 0 and j == n - 1:
+        route[:] = route[::-1].copy()  # Obrácení celé cesty délku nemění
+        return distance
+
+    before, after = route[i - 1], route[(j + 1) % n]
+    removed = solver.distance_matrix.get_distances(np.array([before, route[j]]), np.array([route[i], after]))
+    added = solver.distance_matrix.get_distances(np.array([before, route[i]]), np.array([route[j], after]))
+    route[i:j + 1] = route[i:j + 1][::-1].copy()
+    solver.n_delta_updates += 1
+    return distance - removed.sum(dtype=np.float64) + added.sum(dtype=np.float64)
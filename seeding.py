@@ -0,0 +1,327 @@
+import numpy as np
+
+from local_search import nearest_neighbor_lists
+from sparse_graph import SparseGraph
+
+# Konstrukční heuristiky pro počáteční populaci (viz TSPGeneticSolver, parametr 'seeding')
+SEEDING_STRATEGIES = ("nearest_neighbor", "greedy", "hilbert")
+
+
+class SpatialGrid:
+    """
+    Prostorový index nad souřadnicemi měst: rovnoměrná mřížka, v jejíž buňce je v průměru
+    několik měst. Hledání nejbližšího nenavštíveného města prochází jen okolní buňky
+    po soustředných prstencích, takže nevyžaduje matici vzdáleností.
+    """
+
+    def __init__(self, coordinates, cities_per_cell=2):
+        """
+        Args:
+            coordinates (np.ndarray): Pole (n_cities, 2) se souřadnicemi měst.
+            cities_per_cell (int): Průměrný počet měst v jedné buňce mřížky.
+        """
+        self.coordinates = np.asarray(coordinates, dtype=np.float64)
+        n = self.coordinates.shape[0]
+        self.origin = self.coordinates.min(axis=0)
+        extent = float((self.coordinates.max(axis=0) - self.origin).max()) or 1.0
+        self.n_cells = max(1, int(np.ceil(np.sqrt(n / cities_per_cell))))
+        self.cell_size = extent / self.n_cells
+        self.xs = self.coordinates[:, 0].tolist()
+        self.ys = self.coordinates[:, 1].tolist()
+
+        cells = self._cell_of(self.coordinates)
+        self.city_cells = [(int(cx), int(cy)) for cx, cy in cells]
+        self.cells = {}
+        for city, cell in enumerate(self.city_cells):
+            self.cells.setdefault(cell, set()).add(city)
+        self.n_remaining = n
+
+    def _cell_of(self, points):
+        """Vrátí souřadnice buněk (cx, cy) pro pole bodů."""
+        cells = ((points - self.origin) / self.cell_size).astype(np.intp)
+        return np.minimum(cells, self.n_cells - 1)
+
+    def remove(self, city):
+        """Odebere město z indexu (např. po jeho navštívení)."""
+        self.cells[self.city_cells[city]].discard(city)
+        self.n_remaining -= 1
+
+    def nearest(self, city, k=1):
+        """
+        Vrátí až k nejbližších měst z indexu k městu 'city' (seřazená podle vzdálenosti).
+
+        Prstenec r obsahuje buňky ve vzdálenosti r (Čebyševovsky) od buňky města; město mimo
+        prstence 0..r je dál než r * cell_size, proto lze skončit, jakmile je nalezeno
+        k kandidátů bližších než tato hranice.
+        """
+        cx, cy = self.city_cells[city]
+        x, y = self.xs[city], self.ys[city]
+        k = min(k, self.n_remaining - (city in self.cells[self.city_cells[city]]))
+        if k <= 0:
+            return []
+        candidates = []
+        radius = 0
+        while True:
+            for cell in self._ring(cx, cy, radius):
+                for other in self.cells.get(cell, ()):
+                    if other != city:
+                        candidates.append(((self.xs[other] - x) ** 2 + (self.ys[other] - y) ** 2, other))
+            bound = (radius * self.cell_size) ** 2
+            if len(candidates) >= k and sorted(candidates)[k - 1][0] <= bound or radius > self.n_cells:
+                break
+            radius += 1
+        candidates.sort()
+        return [other for _, other in candidates[:k]]
+
+    def _ring(self, cx, cy, radius):
+        """Buňky mřížky ve Čebyševově vzdálenosti přesně 'radius' od buňky (cx, cy)."""
+        if radius == 0:
+            yield cx, cy
+            return
+        for dx in range(-radius, radius + 1):
+            yield cx + dx, cy - radius
+            yield cx + dx, cy + radius
+        for dy in range(-radius + 1, radius):
+            yield cx - radius, cy + dy
+            yield cx + radius, cy + dy
+
+
+def nearest_neighbor_route(distance_matrix, start=None, randomness=0.1, n_candidates=3, grid=None):
+    """
+    Randomizovaný algoritmus nejbližšího souseda: z náhodného startu jde vždy do nejbližšího
+    nenavštíveného města, s pravděpodobností 'randomness' do jiného z 'n_candidates' nejbližších.
+
+    Instance se souřadnicemi používá prostorový index (SpatialGrid), jinak řádky matice vzdáleností.
+
+    Args:
+        distance_matrix (DistanceMatrix): Řešená instance.
+        start (int, optional): Počáteční město; výchozí je náhodné.
+        randomness (float): Pravděpodobnost, že se nevybere nejbližší město.
+        n_candidates (int): Z kolika nejbližších měst se náhodně vybírá.
+        grid (SpatialGrid, optional): Nepoužitý prostorový index k opětovnému použití (bude vyprázdněn).
+
+    Returns:
+        np.ndarray: Cesta jako permutace indexů měst.
+    """
+    n = distance_matrix.number_of_cities
+    city = int(np.random.randint(n)) if start is None else int(start)
+    draws = np.random.random(n).tolist()
+    picks = np.random.randint(1, max(2, n_candidates), size=n).tolist()
+    route = np.empty(n, dtype=np.intp)
+    route[0] = city
+
+    if isinstance(distance_matrix, SparseGraph):
+        # Řídký graf: jde se po nejkratších hranách, ve slepé uličce se skočí do náhodného nenavštíveného města
+        neighbors = distance_matrix.neighbor_lists()
+        visited = np.zeros(n, dtype=bool)
+        visited[city] = True
+        remaining = np.random.permutation(n).tolist()
+        for step in range(1, n):
+            candidates = [other for other in neighbors[city] if not visited[other]]
+            if candidates:
+                pick = picks[step] if draws[step] < randomness else 0
+                city = candidates[min(pick, n_candidates - 1, len(candidates) - 1)]
+            else:
+                while visited[remaining[-1]]:
+                    remaining.pop()
+                city = remaining.pop()
+            visited[city] = True
+            route[step] = city
+        return route
+
+    if distance_matrix.coordinates is None:
+        visited = np.zeros(n, dtype=bool)
+        visited[city] = True
+        for step in range(1, n):
+            row = np.array(distance_matrix.distances[city], dtype=np.float64)
+            row[visited] = np.inf
+            if draws[step] < randomness and n - step > 1:
+                candidates = np.argpartition(row, min(n_candidates, n - step) - 1)[:n_candidates]
+                candidates = candidates[np.argsort(row[candidates])]
+                city = int(candidates[min(picks[step], n - step - 1, len(candidates) - 1)])
+            else:
+                city = int(np.argmin(row))
+            visited[city] = True
+            route[step] = city
+        return route
+
+    grid = grid if grid is not None else SpatialGrid(distance_matrix.coordinates)
+    grid.remove(city)
+    for step in range(1, n):
+        if draws[step] < randomness:
+            candidates = grid.nearest(city, n_candidates)
+            next_city = candidates[min(picks[step], len(candidates) - 1)]
+        else:
+            next_city = grid.nearest(city)[0]
+        grid.remove(next_city)
+        city = next_city
+        route[step] = city
+    return route
+
+
+def greedy_edge_route(distance_matrix, n_neighbors=10):
+    """
+    Hladový párovací algoritmus: hrany k n_neighbors nejbližším sousedům se přidávají od nejkratší,
+    pokud žádné město nezíská stupeň 3 a nevznikne předčasný cyklus. Zbylé fragmenty cesty
+    se pak napojují vždy na nejbližší volný konec jiného fragmentu.
+
+    Returns:
+        np.ndarray: Cesta jako permutace indexů měst.
+    """
+    n = distance_matrix.number_of_cities
+    if isinstance(distance_matrix, SparseGraph):
+        # Řídký graf: kandidáty jsou přímo jeho hrany
+        neighbors = None
+        sources = np.repeat(np.arange(n), np.diff(distance_matrix.indptr))
+        targets = distance_matrix.indices
+    elif distance_matrix.coordinates is not None:
+        # Prostorový index je pro velké instance výrazně rychlejší než porovnání všech dvojic
+        grid = SpatialGrid(distance_matrix.coordinates)
+        k = min(n_neighbors, n - 1)
+        neighbors = np.array([grid.nearest(city, k) for city in range(n)], dtype=np.intp)
+    else:
+        neighbors = nearest_neighbor_lists(distance_matrix, n_neighbors)
+    if neighbors is not None:
+        sources = np.repeat(np.arange(n), neighbors.shape[1])
+        targets = neighbors.ravel()
+    # Každou neorientovanou hranu jen jednou
+    edges = np.unique(np.stack([np.minimum(sources, targets), np.maximum(sources, targets)], axis=1), axis=0)
+    sources, targets = edges[:, 0], edges[:, 1]
+    order = np.argsort(distance_matrix.get_distances(sources, targets), kind="stable")
+
+    degree = [0] * n
+    parent = list(range(n))
+    links = [[] for _ in range(n)]
+
+    def find(city):
+        while parent[city] != city:
+            parent[city] = parent[parent[city]]
+            city = parent[city]
+        return city
+
+    def link(a, b):
+        degree[a] += 1
+        degree[b] += 1
+        links[a].append(b)
+        links[b].append(a)
+        parent[find(a)] = find(b)
+
+    n_edges = 0
+    for a, b in zip(sources[order].tolist(), targets[order].tolist()):
+        if degree[a] < 2 and degree[b] < 2 and find(a) != find(b):
+            link(a, b)
+            n_edges += 1
+
+    # Napojení fragmentů: z volného konce se jde k nejbližšímu volnému konci jiného fragmentu
+    if n_edges < n - 1:
+        free = np.array([city for city in range(n) if degree[city] < 2], dtype=np.intp)
+        available = np.ones(len(free), dtype=bool)
+        position = {city: idx for idx, city in enumerate(free.tolist())}
+        current, came_from = int(free[0]), -1
+        while n_edges < n - 1:
+            available[position[current]] = False
+            end = _fragment_end(current, came_from, links)
+            available[position[end]] = False
+            candidates = free[available]
+            distances = distance_matrix.get_distances(np.full(len(candidates), end), candidates)
+            current = int(candidates[np.argmin(distances)])
+            link(end, current)
+            came_from = end
+            n_edges += 1
+
+    return _walk_path(links, n)
+
+
+def _fragment_end(city, came_from, links):
+    """Vrátí druhý konec fragmentu cesty, jehož koncem je 'city' (hrana do 'came_from' se nepočítá)."""
+    previous, current = came_from, city
+    while True:
+        following = [other for other in links[current] if other != previous]
+        if not following:
+            return current
+        previous, current = current, following[0]
+
+
+def _walk_path(links, n):
+    """Projde hamiltonovskou cestu zadanou seznamy sousedů od jednoho z jejích konců."""
+    start = next((city for city in range(n) if len(links[city]) < 2), 0)
+    route = np.empty(n, dtype=np.intp)
+    previous, current = -1, start
+    for step in range(n):
+        route[step] = current
+        following = [other for other in links[current] if other != previous]
+        previous, current = current, (following[0] if following else -1)
+    return route
+
+
+def hilbert_route(distance_matrix, order=16):
+    """
+    Seřadí města podle pořadí na Hilbertově křivce (blízká města na křivce jsou blízko i v rovině).
+
+    Args:
+        distance_matrix (DistanceMatrix): Instance se souřadnicemi.
+        order (int): Řád křivky - mřížka má 2^order × 2^order bodů.
+
+    Returns:
+        np.ndarray: Cesta jako permutace indexů měst.
+    """
+    coordinates = distance_matrix.coordinates
+    if coordinates is None:
+        raise ValueError("Řazení podle Hilbertovy křivky vyžaduje souřadnice měst.")
+    side = 1 << order
+    origin = coordinates.min(axis=0)
+    extent = float((coordinates.max(axis=0) - origin).max()) or 1.0
+    scaled = ((coordinates - origin) / extent * (side - 1)).astype(np.int64)
+    x, y = scaled[:, 0].copy(), scaled[:, 1].copy()
+
+    # Vektorizovaný převod (x, y) -> vzdálenost na Hilbertově křivce
+    index = np.zeros(len(x), dtype=np.int64)
+    s = side >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        index += s * s * ((3 * rx) ^ ry)
+        # Otočení kvadrantu, aby navazující podkřivky měly správnou orientaci
+        flip = ~ry
+        swap_x = flip & rx
+        x[swap_x] = side - 1 - x[swap_x]
+        y[swap_x] = side - 1 - y[swap_x]
+        x[flip], y[flip] = y[flip], x[flip].copy()
+        s >>= 1
+    return np.argsort(index, kind="stable").astype(np.intp)
+
+
+def validate_route(route, n_cities):
+    """Převede cestu na pole indexů a ověří, že jde o permutaci všech měst (jinak ValueError)."""
+    route = np.asarray(route, dtype=np.intp)
+    if route.shape != (n_cities,) or not np.array_equal(np.sort(route), np.arange(n_cities)):
+        raise ValueError(f"Počáteční cesta musí být permutací všech {n_cities} měst.")
+    return route
+
+
+def constructive_routes(distance_matrix, n_routes, strategies=SEEDING_STRATEGIES):
+    """
+    Vytvoří až n_routes cest konstrukčními heuristikami.
+
+    Deterministické heuristiky ("greedy", "hilbert") přispějí jednou cestou, zbytek doplní
+    randomizovaný nejbližší soused z různých startů (pokud je mezi strategiemi).
+
+    Returns:
+        list: Seznam cest (np.ndarray).
+    """
+    unknown = [strategy for strategy in strategies if strategy not in SEEDING_STRATEGIES]
+    if unknown:
+        raise ValueError(f"Neznámá strategie inicializace '{unknown[0]}', "
+                         f"povolené jsou: {', '.join(SEEDING_STRATEGIES)}.")
+    routes = []
+    if "greedy" in strategies:
+        routes.append(greedy_edge_route(distance_matrix))
+    if "hilbert" in strategies:
+        routes.append(hilbert_route(distance_matrix))
+    routes = routes[:n_routes]
+    if "nearest_neighbor" in strategies:
+        n = distance_matrix.number_of_cities
+        starts = np.random.choice(n, size=n_routes - len(routes), replace=n_routes - len(routes) > n)
+        for start in starts:
+            routes.append(nearest_neighbor_route(distance_matrix, start=start))
+    return routes
@@ -1,23 +1,78 @@
 import random
+import time
 import numpy as np
 
-# TODO: implementace nespojených měst
+from checkpoint import load_checkpoint, restore_random_state, save_checkpoint
+from fitness_cache import FitnessCache, route_keys
+from instrumentation import PHASES, ConsoleReporter
+from operators import CROSSOVERS, MUTATIONS
+from seeding import SEEDING_STRATEGIES, constructive_routes, validate_route
+from sparse_graph import SparseGraph
+
+# Na které jedince se v memetickém režimu aplikuje lokální prohledávání
+LOCAL_SEARCH_MODES = ("elites", "offspring", "both")
+
+# Reakce adaptivního režimu na pokles diverzity populace
+ADAPTIVE_STRATEGIES = ("mutation", "immigrants")
+
 class TSPGeneticSolver:
     """
     Třída implementující genetický algoritmus pro řešení problému obchodního cestujícího (TSP).
+
+    Instance může být úplný graf (DistanceMatrix) i řídký graf s nespojenými městy (SparseGraph);
+    chybějící hrany mají penalizační délku a počáteční populace se staví náhodnými procházkami po hranách.
     """
 
-    def __init__(self, distance_matrix, population_size, mutation_rate, n_generations, elite_size=1, tournament_size=3):
+    def __init__(self, distance_matrix, population_size, mutation_rate, n_generations, elite_size=1, tournament_size=3,
+                 verbose=True, progress_callback=None, stop_event=None, fitness_cache_size=10_000,
+                 local_search=None, local_search_mode="elites", local_search_rate=0.1, local_search_budget=None,
+                 local_search_max_moves=None, observers=None, profile_phases=False,
+                 time_limit=None, stall_generations=None, target_distance=None, adaptive=None,
+                 diversity_threshold=0.3, max_mutation_rate=0.5, immigrant_fraction=0.2,
+                 seeding=None, seeding_fraction=0.2, seed_routes=None,
+                 checkpoint_path=None, checkpoint_interval=50, crossover="ox", mutation="swap"):
         """
         Inicializuje genetický algoritmus.
 
         Args:
-            distance_matrix (DistanceMatrix): Objekt obsahující matici vzdáleností mezi městy.
+            distance_matrix (DistanceMatrix | SparseGraph): Objekt obsahující vzdálenosti mezi městy.
             population_size (int): Počet jedinců (cest) v populaci.
             mutation_rate (float): Pravděpodobnost, s jakou dojde k mutaci jedince.
             n_generations (int): Počet generací, po které algoritmus poběží.
             elite_size (int): Počet nejlepších jedinců, kteří automaticky postoupí do další generace.
             tournament_size (int): Počet jedinců vybíraných do turnaje při selekci.
+            verbose (bool): Zda vypisovat průběh výpočtu na standardní výstup (přidá ConsoleReporter).
+            progress_callback (callable, optional): Volá se po každé generaci jako
+                progress_callback(generace, nejlepší vzdálenost, nejlepší cesta).
+            stop_event (threading.Event, optional): Objekt s metodou is_set(); po jeho nastavení
+                se výpočet ukončí a vrátí se dosud nejlepší cesta.
+            fitness_cache_size (int): Kolik délek cest si pamatovat v cache (0 = cache vypnuta).
+            local_search (LocalSearch, optional): Lokální prohledávání (2-opt/Or-opt) pro memetický režim.
+            local_search_mode (str): Na koho se lokální prohledávání aplikuje: "elites", "offspring" nebo "both".
+            local_search_rate (float): Pravděpodobnost, že bude vylepšen daný potomek (režimy s "offspring").
+            local_search_budget (float, optional): Časový rozpočet lokálního prohledávání v sekundách na generaci.
+            local_search_max_moves (int, optional): Maximální počet tahů při vylepšení jednoho jedince.
+            observers (list, optional): Pozorovatelé běhu - volatelné objekty, které dostávají slovník
+                s událostí "start", "generation" nebo "finish" (viz instrumentation.py).
+            profile_phases (bool): Zda měřit čas jednotlivých fází generace (viz instrumentation.PHASES).
+            time_limit (float, optional): Ukončí výpočet po uplynutí tolika sekund.
+            stall_generations (int, optional): Ukončí výpočet, pokud se nejlepší vzdálenost
+                nezlepšila po tolik generací.
+            target_distance (float, optional): Ukončí výpočet po nalezení cesty s délkou nejvýše target_distance.
+            adaptive (str, optional): Reakce na pokles diverzity pod 'diversity_threshold':
+                "mutation" (zvýší mutation_rate až na max_mutation_rate) nebo
+                "immigrants" (nahradí nejhorší jedince náhodnými). None = vypnuto.
+            diversity_threshold (float): Hranice diverzity (podíl různých délek cest v populaci).
+            max_mutation_rate (float): Horní mez mutation_rate v adaptivním režimu "mutation".
+            immigrant_fraction (float): Jaká část populace se nahradí v adaptivním režimu "immigrants".
+            seeding (tuple, optional): Konstrukční heuristiky pro část počáteční populace
+                (viz seeding.SEEDING_STRATEGIES: "nearest_neighbor", "greedy", "hilbert").
+            seeding_fraction (float): Jaká část počáteční populace se vytvoří heuristikami.
+            seed_routes (list, optional): Vlastní počáteční cesty (permutace měst), které se vloží do populace.
+            checkpoint_path (str, optional): Soubor, do kterého se průběžně ukládá stav běhu (viz checkpoint.py).
+            checkpoint_interval (int): Po kolika generacích se checkpoint ukládá (a vždy na konci běhu).
+            crossover (str): Operátor křížení z registru operators.CROSSOVERS ("ox", "erx", "eax").
+            mutation (str): Operátor mutace z registru operators.MUTATIONS ("swap", "inversion").
         """
         self.distance_matrix = distance_matrix
         self.n_cities = distance_matrix.number_of_cities
@@ -26,11 +81,103 @@ class TSPGeneticSolver:
         self.n_generations = n_generations
         self.elite_size = elite_size
         self.tournament_size = tournament_size
+        self.verbose = verbose
+        self.progress_callback = progress_callback
+        self.stop_event = stop_event
+        self.fitness_cache = FitnessCache(fitness_cache_size) if fitness_cache_size > 0 else None
+        self.local_search = local_search
+        self.local_search_mode = local_search_mode
+        self.local_search_rate = local_search_rate
+        self.local_search_budget = local_search_budget
+        self.local_search_max_moves = local_search_max_moves
+        self._locally_optimal_keys = set()  # Elity, které už lokálním prohledáváním prošly
+        # Počitadla pro statistiky běhu (viz get_stats)
+        self.n_evaluations = 0
+        self.n_delta_updates = 0
+        self.cancelled = False
+        self.generation = 0  # Počet dokončených generací
+        self.termination_reason = None
+
+        # Ukončení podle času, stagnace nebo cílové vzdálenosti a adaptivní mutace
+        self.time_limit = time_limit
+        self.stall_generations = stall_generations
+        self.target_distance = target_distance
+        self.adaptive = adaptive
+        self.diversity_threshold = diversity_threshold
+        self.max_mutation_rate = max_mutation_rate
+        self.immigrant_fraction = immigrant_fraction
+        self.base_mutation_rate = mutation_rate
+        self._deadline = None
+
+        # Počáteční populace z konstrukčních heuristik a zadaných cest
+        self.seeding = (seeding,) if isinstance(seeding, str) else tuple(seeding or ())
+        self.seeding_fraction = seeding_fraction
+        self.seed_routes = [validate_route(route, self.n_cities) for route in (seed_routes or [])]
+
+        # Genetické operátory z registru (viz operators.py)
+        self.crossover = crossover
+        self.mutation = mutation
+        self._candidate_lists = None  # Kandidátní sousedé pro EAX, spočítají se při prvním použití
+        self._parents_buffer = None  # Předalokovaný buffer rodičů (viz _next_generation)
+
+        # Průběžné ukládání stavu pro pokračování po přerušení
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+
+        # Instrumentace: pozorovatelé a měření fází (bez pozorovatelů se metriky generací nepočítají)
+        self.observers = list(observers or [])
+        if verbose:
+            self.observers.insert(0, ConsoleReporter())
+        if progress_callback is not None:
+            self.observers.append(
+                lambda event: event["event"] == "generation" and
+                progress_callback(event["generation"], event["best_distance"], event["best_route"]))
+        self.profile_phases = profile_phases
+        self.phase_times = dict.fromkeys(PHASES, 0.0)  # Celkové časy fází za celý běh
+        self._generation_phase_times = dict.fromkeys(PHASES, 0.0)
 
         if self.elite_size >= self.population_size:
             raise ValueError("Velikost elity (elite_size) musí být menší než velikost populace (population_size).")
         if self.n_cities <= 1:
             raise ValueError("Počet měst musí být alespoň 2 pro řešení TSP.")
+        if self.local_search_mode not in LOCAL_SEARCH_MODES:
+            raise ValueError(f"Neznámý režim lokálního prohledávání '{self.local_search_mode}', "
+                             f"povolené jsou: {', '.join(LOCAL_SEARCH_MODES)}.")
+        if self.adaptive is not None and self.adaptive not in ADAPTIVE_STRATEGIES:
+            raise ValueError(f"Neznámý adaptivní režim '{self.adaptive}', "
+                             f"povolené jsou: {', '.join(ADAPTIVE_STRATEGIES)}.")
+        unknown_seeding = [strategy for strategy in self.seeding if strategy not in SEEDING_STRATEGIES]
+        if unknown_seeding:
+            raise ValueError(f"Neznámá strategie inicializace '{unknown_seeding[0]}', "
+                             f"povolené jsou: {', '.join(SEEDING_STRATEGIES)}.")
+        if "hilbert" in self.seeding and distance_matrix.coordinates is None:
+            raise ValueError("Inicializace 'hilbert' vyžaduje instanci se souřadnicemi měst.")
+        if self.crossover not in CROSSOVERS:
+            raise ValueError(f"Neznámý operátor křížení '{self.crossover}', "
+                             f"povolené jsou: {', '.join(CROSSOVERS)}.")
+        if self.mutation not in MUTATIONS:
+            raise ValueError(f"Neznámý operátor mutace '{self.mutation}', "
+                             f"povolené jsou: {', '.join(MUTATIONS)}.")
+        if self.checkpoint_interval < 1:
+            raise ValueError("Interval ukládání checkpointu (checkpoint_interval) musí být alespoň 1.")
+        if len(self.seed_routes) > self.population_size:
+            raise ValueError("Počet zadaných počátečních cest je větší než velikost populace.")
+
+    def add_observer(self, observer):
+        """Přidá pozorovatele běhu (volatelný objekt, který dostává slovník s událostí)."""
+        self.observers.append(observer)
+
+    def _notify(self, event):
+        """Předá událost všem pozorovatelům."""
+        for observer in self.observers:
+            observer(event)
+
+    def _phase_done(self, phase, started):
+        """Připočte čas od 'started' k fázi 'phase' a vrátí aktuální čas (začátek další fáze)."""
+        now = time.perf_counter()
+        self._generation_phase_times[phase] += now - started
+        self.phase_times[phase] += now - started
+        return now
 
     def _create_individual(self):
         """Vytvoří jednoho jedince (náhodnou cestu)."""
@@ -39,18 +186,82 @@ class TSPGeneticSolver:
         return individual
 
     def _initialize_population(self):
-        """Inicializuje populaci náhodnými jedinci."""
-        return [self._create_individual() for _ in range(self.population_size)]
+        """
+        Inicializuje populaci náhodnými jedinci.
+        Populace je 2D pole (population_size, n_cities), každý řádek je jedna permutace měst.
+        Na začátek populace se vloží zadané cesty (seed_routes) a cesty z konstrukčních heuristik (seeding).
+        """
+        seeded = list(self.seed_routes)
+        if self.seeding:
+            n_constructed = min(int(self.population_size * self.seeding_fraction), self.population_size - len(seeded))
+            seeded += constructive_routes(self.distance_matrix, n_constructed, self.seeding)
+
+        population = self._random_routes(self.population_size - len(seeded))
+        if seeded:
+            population = np.concatenate([np.array(seeded, dtype=np.intp), population])
+        return population
+
+    def _random_routes(self, n_routes):
+        """Vytvoří pole (n_routes, n_cities) náhodných cest."""
+        if isinstance(self.distance_matrix, SparseGraph):
+            # Náhodné permutace by v řídkém grafu skoro vždy vedly přes chybějící hrany
+            return np.array([self.distance_matrix.random_walk_route() for _ in range(n_routes)],
+                            dtype=np.intp).reshape(n_routes, self.n_cities)
+        # argsort náhodných čísel po řádcích = náhodná permutace pro každého jedince najednou
+        random_keys = np.random.random((n_routes, self.n_cities))
+        return np.argsort(random_keys, axis=1).astype(np.intp)
+
+    def _calculate_population_distances(self, population):
+        """
+        Vypočítá délky všech cest v populaci najednou.
+
+        Args:
+            population (np.ndarray): Pole (počet jedinců, n_cities) s indexy měst.
+
+        Returns:
+            np.ndarray: Pole délek cest, jedna hodnota pro každý řádek populace.
+        """
+        population = np.asarray(population, dtype=np.intp)
+        # Následník každého města v cestě (poslední město se vrací do startovního)
+        next_cities = np.roll(population, -1, axis=1)
+        # Jeden vektorizovaný gather přes celou matici vzdáleností (nebo výpočet ze souřadnic)
+        return self.distance_matrix.get_distances(population, next_cities).sum(axis=1, dtype=np.float64)
+
+    def _evaluate_population(self, population):
+        """
+        Vrátí délky cest populace; cesty uložené ve fitness cache se znovu nepočítají.
+        Chybějící délky se spočítají najednou a do cache se uloží.
+        """
+        population = np.asarray(population, dtype=np.intp)
+        if self.fitness_cache is None:
+            self.n_evaluations += len(population)
+            return self._calculate_population_distances(population)
+
+        keys = route_keys(population)
+        distances = np.empty(len(population))
+        missing = []
+        for idx, key in enumerate(keys):
+            cached = self.fitness_cache.get(key)
+            if cached is None:
+                missing.append(idx)
+            else:
+                distances[idx] = cached
+
+        if missing:
+            computed = self._calculate_population_distances(population[missing])
+            distances[missing] = computed
+            self.n_evaluations += len(missing)
+            for idx, distance in zip(missing, computed):
+                self.fitness_cache.put(keys[idx], float(distance))
+        return distances
+
+    def _calculate_population_fitnesses(self, population):
+        """Vypočítá fitness všech jedinců v populaci (viz _calculate_fitness)."""
+        return 1.0 / (self._calculate_population_distances(population) + 1e-9)
 
     def _calculate_total_distance(self, route):
         """Vypočítá celkovou délku dané cesty."""
-        total_distance = 0
-        for i in range(self.n_cities):
-            from_city = route[i]
-            # Použití modula pro zajištění návratu do startovního města
-            to_city = route[(i + 1) % self.n_cities]
-            total_distance += self.distance_matrix.get_distance(from_city, to_city)
-        return total_distance
+        return float(self._calculate_population_distances(np.asarray(route)[np.newaxis, :])[0])
 
     def _calculate_fitness(self, route):
         """
@@ -80,114 +291,401 @@ class TSPGeneticSolver:
 
         return population[best_idx_in_tournament]
 
+    def _tournament_selection_batch(self, fitnesses, n_winners):
+        """
+        Turnajová selekce pro n_winners rodičů najednou (stejné pravidlo jako _tournament_selection:
+        vyhrává první jedinec s nejvyšší fitness). Všechny turnaje se losují jedním voláním.
+
+        Returns:
+            np.ndarray: Indexy vítězů turnajů.
+        """
+        contestants = np.random.randint(0, len(fitnesses), (n_winners, self.tournament_size))
+        winners = np.argmax(fitnesses[contestants], axis=1)
+        return np.take_along_axis(contestants, winners[:, np.newaxis], axis=1)[:, 0]
+
     def _order_crossover(self, parent1, parent2):
         """
         Provede křížení pomocí metody Order Crossover (OX1).
         Zachovává relativní pořadí prvků z druhého rodiče.
         """
-        child = [-1] * self.n_cities
+        child = self._order_crossover_batch(np.asarray(parent1)[np.newaxis, :],
+                                            np.asarray(parent2)[np.newaxis, :])[0]
+        return child.tolist()
 
-        # 1. Vyber náhodný souvislý úsek z parent1
-        start, end = sorted(random.sample(range(self.n_cities), 2))
-        child[start:end + 1] = parent1[start:end + 1]
-
-        # Množina prvků již přítomných v potomkovi pro rychlou kontrolu
-        elements_in_child = set(child[start:end + 1])
-
-        # 2. Doplň zbývající pozice z parent2
-        parent2_idx = 0
-        child_idx = 0
-
-        while -1 in child:
-            # Najdi další volné místo v potomkovi (začínáme od začátku)
-            if child[child_idx] == -1:
-                # Najdi další prvek v parent2, který ještě není v potomkovi
-                current_parent2_element = parent2[parent2_idx]
-                while current_parent2_element in elements_in_child:
-                    parent2_idx = (parent2_idx + 1) % self.n_cities  # Posun v parent2 (cyklicky)
-                    current_parent2_element = parent2[parent2_idx]
-
-                # Vlož prvek a posuň index v parent2
-                child[child_idx] = current_parent2_element
-                parent2_idx = (parent2_idx + 1) % self.n_cities
+    def _order_crossover_batch(self, parents1, parents2, starts=None, ends=None, out=None):
+        """
+        Provede Order Crossover (OX1) pro celé pole dvojic rodičů najednou, v čase O(n) na potomka.
 
-            # Posuň index v potomkovi (cyklicky)
-            child_idx = (child_idx + 1) % self.n_cities
+        Potomek převezme úsek [start, end] z parent1 a zbývající pozice (zleva doprava)
+        doplní městy z parent2 v pořadí, v jakém se v parent2 vyskytují.
 
-        return child
+        Args:
+            parents1 (np.ndarray): Pole (k, n_cities) prvních rodičů.
+            parents2 (np.ndarray): Pole (k, n_cities) druhých rodičů.
+            starts (np.ndarray, optional): Začátky úseků; pokud chybí, vyberou se náhodně.
+            ends (np.ndarray, optional): Konce úseků (včetně); pokud chybí, vyberou se náhodně.
+            out (np.ndarray, optional): Předalokované pole (k, n_cities) pro potomky.
+
+        Returns:
+            np.ndarray: Pole (k, n_cities) potomků.
+        """
+        parents1 = np.asarray(parents1, dtype=np.intp)
+        parents2 = np.asarray(parents2, dtype=np.intp)
+        n_children = parents1.shape[0]
+
+        # 1. Vyber náhodný souvislý úsek pro každého potomka (dva různé indexy)
+        if starts is None or ends is None:
+            first = np.random.randint(0, self.n_cities, n_children)
+            second = np.random.randint(0, self.n_cities - 1, n_children)
+            second += second >= first
+            starts, ends = np.minimum(first, second), np.maximum(first, second)
+
+        positions = np.arange(self.n_cities)
+        in_segment = (positions >= np.asarray(starts)[:, np.newaxis]) & (positions <= np.asarray(ends)[:, np.newaxis])
+
+        # Pro každé město: je v úseku převzatém z parent1?
+        city_in_segment = np.zeros_like(in_segment)
+        np.put_along_axis(city_in_segment, parents1, in_segment, axis=1)
+
+        # 2. Města z parent2, která v úseku nejsou, v pořadí parent2
+        keep_from_parent2 = ~np.take_along_axis(city_in_segment, parents2, axis=1)
+
+        # Počet volných pozic a ponechaných měst je v každém řádku stejný,
+        # takže booleovské indexování (po řádcích) je přiřadí ve správném pořadí
+        if out is None:
+            children = parents1.copy()
+        else:
+            children = out
+            children[...] = parents1
+        children[~in_segment] = parents2[keep_from_parent2]
+        return children
 
     def _swap_mutation(self, route):
         """
         Provede mutaci prohozením dvou náhodně vybraných měst v cestě.
         Mutace se provede s pravděpodobností 'mutation_rate'.
         """
-        mutated_route = route[:]  # Vytvoříme kopii
+        mutated_route = route.copy()  # Vytvoříme kopii (funguje pro list i np.ndarray)
         if random.random() < self.mutation_rate:
             # Vybereme dva různé indexy ke prohození
             idx1, idx2 = random.sample(range(self.n_cities), 2)
             mutated_route[idx1], mutated_route[idx2] = mutated_route[idx2], mutated_route[idx1]
         return mutated_route
 
-    def solve(self):
+    def _swap_mutation_with_delta(self, route, distance):
         """
-        Spustí genetický algoritmus a vrátí nejlepší nalezenou cestu a její délku.
+        Stejná mutace jako _swap_mutation, ale provede se přímo v poli 'route' (np.ndarray)
+        a délka cesty se aktualizuje v O(1) jen podle změněných hran.
+
+        Returns:
+            float: Délka cesty po mutaci.
+        """
+        if random.random() >= self.mutation_rate:
+            return distance
+
+        idx1, idx2 = random.sample(range(self.n_cities), 2)
+        # Hrany začínající na těchto pozicích jsou jediné, kterých se prohození týká
+        edge_starts = np.unique(np.array([idx1 - 1, idx1, idx2 - 1, idx2]) % self.n_cities)
+        edge_ends = (edge_starts + 1) % self.n_cities
+
+        removed = self.distance_matrix.get_distances(route[edge_starts], route[edge_ends]).sum(dtype=np.float64)
+        route[idx1], route[idx2] = route[idx2], route[idx1]
+        added = self.distance_matrix.get_distances(route[edge_starts], route[edge_ends]).sum(dtype=np.float64)
+
+        self.n_delta_updates += 1
+        return distance - removed + added
+
+    def _next_generation(self, population, fitnesses, distances, out=None):
         """
-        population = self._initialize_population()
-        best_overall_route = None
-        best_overall_distance = float('inf')
+        Vytvoří novou generaci z aktuální populace (elitismus, selekce, křížení, mutace).
 
-        print(f"Spouštění GA pro TSP: {self.n_generations} generací, velikost populace {self.population_size}...")
+        Args:
+            population (np.ndarray): Aktuální populace (population_size, n_cities).
+            fitnesses (np.ndarray): Fitness jedinců aktuální populace.
+            distances (np.ndarray): Délky cest aktuální populace.
+            out (tuple, optional): Předalokované buffery (populace, délky) pro novou generaci;
+                nesmí sdílet paměť s 'population'. Pokud chybí, alokují se nové.
+
+        Returns:
+            tuple: (nová populace stejného tvaru, délky jejích cest)
+        """
+        started = time.perf_counter() if self.profile_phases else None
+        if out is None:
+            next_population, next_distances = np.empty_like(population), np.empty(self.population_size)
+        else:
+            next_population, next_distances = out
+
+        # 1. Elitismus: Přeneseme nejlepší jedince přímo (včetně jejich již známé délky)
+        # Seřadíme indexy jedinců podle fitness sestupně
+        sorted_indices = np.argsort(fitnesses)[::-1]
+        next_population[:self.elite_size] = population[sorted_indices[:self.elite_size]]
+        next_distances[:self.elite_size] = distances[sorted_indices[:self.elite_size]]
+        if started is not None:
+            started = self._phase_done("elitism", started)
+
+        # 2. Doplníme zbytek populace pomocí selekce, křížení a mutace
+        n_children = self.population_size - self.elite_size
+
+        # Selekce rodičů: všechny turnaje najednou, rodiče se kopírují do předalokovaného bufferu
+        winners = self._tournament_selection_batch(fitnesses, 2 * n_children)
+        if self._parents_buffer is None or self._parents_buffer.shape != (2 * n_children, self.n_cities):
+            self._parents_buffer = np.empty((2 * n_children, self.n_cities), dtype=np.intp)
+        parents = np.take(population, winners, axis=0, out=self._parents_buffer)
+        parents1, parents2 = parents[:n_children], parents[n_children:]
+        if started is not None:
+            started = self._phase_done("selection", started)
+
+        # Křížení všech potomků generace jedním voláním přímo do nové populace a jejich ohodnocení
+        children = CROSSOVERS[self.crossover](self, parents1, parents2, out=next_population[self.elite_size:])
+        if started is not None:
+            started = self._phase_done("crossover", started)
+        child_distances = self._evaluate_population(children)
+        if started is not None:
+            started = self._phase_done("fitness", started)
+
+        mutate = MUTATIONS[self.mutation]
+        for child_idx in range(n_children):
+            # Mutace v místě (s delta aktualizací délky); potomci už leží v nové populaci
+            child_distances[child_idx] = mutate(self, children[child_idx], child_distances[child_idx])
+        next_distances[self.elite_size:] = child_distances
+        if started is not None:
+            started = self._phase_done("mutation", started)
+
+        # 3. Memetický krok: lokální prohledávání vybraných jedinců
+        if self.local_search is not None:
+            self._apply_local_search(next_population, next_distances)
+            if started is not None:
+                self._phase_done("local_search", started)
+
+        return next_population, next_distances
+
+    def _apply_local_search(self, population, distances):
+        """
+        Vylepší elity a/nebo náhodně vybrané potomky lokálním prohledáváním (v místě).
+        Respektuje časový rozpočet na generaci; elity, které už optimalizované byly, přeskočí.
+        """
+        deadline = None
+        if self.local_search_budget is not None:
+            deadline = time.perf_counter() + self.local_search_budget
+
+        candidates = []
+        if self.local_search_mode in ("elites", "both"):
+            candidates.extend(range(self.elite_size))
+        if self.local_search_mode in ("offspring", "both"):
+            selected = np.random.random(self.population_size - self.elite_size) < self.local_search_rate
+            candidates.extend((np.flatnonzero(selected) + self.elite_size).tolist())
+
+        for idx in candidates:
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            elite_key = None
+            if idx < self.elite_size:
+                elite_key = route_keys(population[idx:idx + 1])[0]
+                if elite_key in self._locally_optimal_keys:
+                    continue
+
+            route, distance, converged = self.local_search.improve(population[idx], distances[idx], deadline,
+                                                                   self.local_search_max_moves)
+            population[idx] = route
+            distances[idx] = distance
+
+            # Jako hotovou elitu si cestu zapamatujeme, jen pokud ji nepřerušil časový rozpočet ani limit tahů
+            if elite_key is not None and converged:
+                if len(self._locally_optimal_keys) >= 10_000:
+                    self._locally_optimal_keys.clear()
+                self._locally_optimal_keys.add(route_keys(population[idx:idx + 1])[0])
+
+    def _adapt_to_diversity(self, population, distances, diversity):
+        """
+        Adaptivní režim: při nízké diverzitě zvýší mutation_rate, nebo nahradí nejhorší
+        jedince náhodnými (v místě). Při obnovené diverzitě se mutation_rate vrací k výchozí hodnotě.
+        """
+        if diversity >= self.diversity_threshold:
+            self.mutation_rate = max(self.base_mutation_rate, self.mutation_rate * 0.9)
+            return
+        if self.adaptive == "mutation":
+            self.mutation_rate = min(self.max_mutation_rate, self.mutation_rate * 1.5)
+        else:
+            n_immigrants = min(max(1, int(self.population_size * self.immigrant_fraction)),
+                               self.population_size - self.elite_size)
+            worst = np.argsort(distances)[-n_immigrants:]
+            immigrants = self._random_routes(n_immigrants)
+            population[worst] = immigrants
+            distances[worst] = self._evaluate_population(immigrants)
+
+    def _should_stop(self, generation, best_distance, last_improvement):
+        """Vrátí důvod ukončení výpočtu ("cancelled", "target", "stall", "time_limit"), nebo None."""
+        if self.stop_event is not None and self.stop_event.is_set():
+            return "cancelled"
+        if self.target_distance is not None and best_distance <= self.target_distance:
+            return "target"
+        if self.stall_generations is not None and generation - last_improvement >= self.stall_generations:
+            return "stall"
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            return "time_limit"
+        return None
+
+    def _save_checkpoint(self, population, distances, best_route, best_distance, last_improvement):
+        """Uloží stav běhu po self.generation dokončených generacích do self.checkpoint_path."""
+        save_checkpoint(self.checkpoint_path, population, distances, best_route, best_distance,
+                        self.generation, last_improvement, self.mutation_rate, self._locally_optimal_keys)
+
+    def _evolve(self, population, n_generations, start_generation=0, distances=None,
+                best_route=None, best_distance=float('inf'), last_improvement=None):
+        """
+        Nechá populaci vyvíjet po zadaný počet generací.
 
-        for generation in range(self.n_generations):
-            # Vypočítáme fitness pro všechny jedince v populaci
-            fitnesses = [self._calculate_fitness(route) for route in population]
+        Args:
+            population (np.ndarray): Počáteční populace (population_size, n_cities).
+            n_generations (int): Počet generací, které se mají provést.
+            start_generation (int): Pořadové číslo první generace (pro výpisy).
+            distances (np.ndarray, optional): Známé délky cest populace (např. z checkpointu).
+            best_route (list, optional): Dosud nejlepší cesta při pokračování z checkpointu.
+            best_distance (float): Délka dosud nejlepší cesty.
+            last_improvement (int, optional): Generace posledního zlepšení; výchozí je start_generation.
+
+        Returns:
+            tuple: (poslední populace, nejlepší nalezená cesta jako list, její délka)
+        """
+        best_overall_route = best_route
+        best_overall_distance = best_distance
+        if distances is None:
+            started = time.perf_counter() if self.profile_phases else None
+            distances = self._evaluate_population(population)
+            if started is not None:
+                self._phase_done("fitness", started)
+        run_started = time.perf_counter()
+        if last_improvement is None:
+            last_improvement = start_generation
+
+        # Dva buffery populace, které se po každé generaci prohodí - generace nic nealokuje
+        population = np.ascontiguousarray(population, dtype=np.intp)
+        distances = np.array(distances, dtype=np.float64)
+        spare_population, spare_distances = np.empty_like(population), np.empty_like(distances)
+
+        for generation in range(start_generation, start_generation + n_generations):
+            if (self.checkpoint_path is not None and generation > start_generation
+                    and generation % self.checkpoint_interval == 0):
+                self._save_checkpoint(population, distances, best_overall_route, best_overall_distance,
+                                      last_improvement)
+
+            # Zrušení zvenku, dosažení cíle, stagnace nebo vypršení času - vrátíme dosud nejlepší řešení
+            reason = self._should_stop(generation, best_overall_distance, last_improvement)
+            if reason is not None:
+                self.termination_reason = reason
+                self.cancelled = reason == "cancelled"
+                break
+
+            # Délky cest známe z předchozí generace, fitness z nich spočítáme najednou
+            fitnesses = 1.0 / (distances + 1e-9)
 
             # Najdeme nejlepšího jedince v aktuální generaci
             current_best_idx = np.argmax(fitnesses)
-            current_best_route = population[current_best_idx]
-            current_best_distance = self._calculate_total_distance(current_best_route)
+            current_best_distance = float(distances[current_best_idx])
 
             # Aktualizujeme celkově nejlepší řešení, pokud je aktuální lepší
-            if current_best_distance < best_overall_distance:
+            improved = current_best_distance < best_overall_distance
+            if improved:
                 best_overall_distance = current_best_distance
-                best_overall_route = current_best_route
-                # Vypíšeme informaci o novém nejlepším řešení
-                print(f"Generace {generation + 1}: Nová nejlepší vzdálenost = {best_overall_distance:.2f}")
-            # Pravidelný výpis progresu, např. každých 20 generací nebo pokud není zlepšení
-            elif (generation + 1) % 20 == 0:
-                print(f"Generace {generation + 1}: Aktuální nejlepší vzdálenost = {best_overall_distance:.2f}")
-
-            # Vytvoření nové generace
-            next_population = []
-
-            # 1. Elitismus: Přeneseme nejlepší jedince přímo
-            # Seřadíme indexy jedinců podle fitness sestupně
-            sorted_indices = np.argsort(fitnesses)[::-1]
-            for i in range(self.elite_size):
-                elite_idx = sorted_indices[i]
-                next_population.append(population[elite_idx])
-
-            # 2. Doplníme zbytek populace pomocí selekce, křížení a mutace
-            while len(next_population) < self.population_size:
-                # Selekce rodičů
-                parent1 = self._tournament_selection(population, fitnesses)
-                parent2 = self._tournament_selection(population, fitnesses)
-                # Můžeme přidat kontrolu, aby rodiče nebyli stejní (není nutné, ale může mírně pomoci diverzitě)
-                # while parent1 is parent2:
-                #     parent2 = self._tournament_selection(population, fitnesses)
-
-                # Křížení
-                child = self._order_crossover(parent1, parent2)
-
-                # Mutace
-                mutated_child = self._swap_mutation(child)
-
-                # Přidání nového jedince do další generace
-                next_population.append(mutated_child)
-
-            # Nahradíme starou populaci novou
-            population = next_population
-
-        print(f"GA dokončen. Nejlepší nalezená vzdálenost: {best_overall_distance:.2f}")
+                best_overall_route = population[current_best_idx].tolist()
+                last_improvement = generation
+
+            diversity = None
+            if self.observers or self.adaptive is not None:
+                # Podíl různých délek cest v populaci - levná míra diverzity
+                diversity = len(np.unique(distances)) / len(distances)
+
+            if self.observers:
+                self._notify({
+                    "event": "generation",
+                    "generation": generation + 1,
+                    "best_distance": best_overall_distance,
+                    "best_route": best_overall_route,
+                    "improved": improved,
+                    "current_best_distance": current_best_distance,
+                    "mean_distance": float(distances.mean()),
+                    "diversity": diversity,
+                    "mutation_rate": self.mutation_rate,
+                    "evaluations": self.n_evaluations,
+                    "elapsed": time.perf_counter() - run_started,
+                    # Časy fází předchozí generace (ta vytvořila aktuální populaci)
+                    "phase_times": dict(self._generation_phase_times) if self.profile_phases else None,
+                })
+            if self.profile_phases:
+                self._generation_phase_times = dict.fromkeys(PHASES, 0.0)
+
+            if self.adaptive is not None:
+                self._adapt_to_diversity(population, distances, diversity)
+                fitnesses = 1.0 / (distances + 1e-9)
+
+            # Nová generace se zapíše do volných bufferů, stará populace se stane volným bufferem
+            next_population, next_distances = self._next_generation(
+                population, fitnesses, distances, out=(spare_population, spare_distances))
+            spare_population, spare_distances = population, distances
+            population, distances = next_population, next_distances
+            self.generation = generation + 1
+        else:
+            self.termination_reason = "generations"
+
+        if self.checkpoint_path is not None:
+            self._save_checkpoint(population, distances, best_overall_route, best_overall_distance, last_improvement)
+        return population, best_overall_route, best_overall_distance
+
+    def get_stats(self):
+        """
+        Vrátí statistiky běhu: počet skutečně spočítaných délek cest, počet delta aktualizací
+        po mutaci a úspěšnost fitness cache.
+        """
+        stats = {
+            "evaluations": self.n_evaluations,
+            "delta_updates": self.n_delta_updates,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "cache_hit_rate": 0.0,
+            "local_search_moves": self.local_search.n_moves if self.local_search is not None else 0,
+            "phase_times": dict(self.phase_times) if self.profile_phases else None,
+            "generations": self.generation,
+            "termination_reason": self.termination_reason,
+        }
+        if self.fitness_cache is not None:
+            stats.update(cache_hits=self.fitness_cache.hits, cache_misses=self.fitness_cache.misses,
+                         cache_hit_rate=self.fitness_cache.hit_rate)
+        return stats
+
+    def solve(self, resume_from=None):
+        """
+        Spustí genetický algoritmus a vrátí nejlepší nalezenou cestu a její délku.
+
+        Args:
+            resume_from (str, optional): Checkpoint, ze kterého se má pokračovat. Běh pak pokračuje
+                přesně tam, kde checkpoint skončil, až do celkového počtu n_generations generací.
+        """
+        self.cancelled = False
+        self._deadline = time.perf_counter() + self.time_limit if self.time_limit is not None else None
+        if resume_from is None:
+            population = self._initialize_population()
+            self.mutation_rate = self.base_mutation_rate
+            self.generation = 0
+            self._locally_optimal_keys = set()
+            state = {}
+        else:
+            checkpoint = load_checkpoint(resume_from)
+            population = checkpoint["population"]
+            if population.shape != (self.population_size, self.n_cities):
+                raise ValueError("Checkpoint neodpovídá velikosti populace nebo počtu měst.")
+            restore_random_state(checkpoint)
+            self.mutation_rate = checkpoint["mutation_rate"]
+            self.generation = checkpoint["generation"]
+            self._locally_optimal_keys = checkpoint["locally_optimal_keys"]
+            state = {key: checkpoint[key] for key in ("distances", "best_route", "best_distance", "last_improvement")}
+        self._notify({"event": "start", "n_generations": self.n_generations,
+                      "population_size": self.population_size, "n_cities": self.n_cities})
+
+        _, best_overall_route, best_overall_distance = self._evolve(
+            population, self.n_generations - self.generation, self.generation, **state)
+
+        self._notify({"event": "finish", "generation": self.generation, "best_distance": best_overall_distance,
+                      "best_route": best_overall_route, "cancelled": self.cancelled, "termination_reason": self.termination_reason,
+                      "stats": self.get_stats()})
         # Vrátíme nejlepší nalezenou cestu a její vzdálenost
-        return best_overall_route, best_overall_distance
\ No newline at end of file
+        return best_overall_route, best_overall_distance
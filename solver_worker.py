@@ -0,0 +1,59 @@
+import random
+import time
+
+import numpy as np
+
+from solver import TSPGeneticSolver
+
+
+class ThrottledProgress:
+    """
+    Callback pro TSPGeneticSolver, který posílá průběh do fronty nejvýše jednou
+    za 'min_interval' sekund, aby se UI nezahltilo zprávami z každé generace.
+    """
+
+    def __init__(self, progress_queue, min_interval=0.25):
+        """
+        Args:
+            progress_queue: Fronta s metodou put() (např. multiprocessing.Manager().Queue()).
+            min_interval (float): Minimální odstup dvou zpráv v sekundách.
+        """
+        self.progress_queue = progress_queue
+        self.min_interval = min_interval
+        self._last_sent = 0.0
+        self._last_sent_distance = float('inf')
+
+    def __call__(self, generation, best_distance, best_route):
+        now = time.monotonic()
+        if now - self._last_sent < self.min_interval:
+            return
+        # Cestu posíláme jen při zlepšení, jinak stačí číslo generace
+        route = best_route if best_distance < self._last_sent_distance else None
+        self.progress_queue.put((generation, best_distance, route))
+        self._last_sent = now
+        self._last_sent_distance = best_distance
+
+
+def solve_with_progress(distance_matrix, solver_kwargs, progress_queue=None, stop_event=None, min_interval=0.25,
+                        seed=None):
+    """
+    Spustí TSPGeneticSolver (typicky v pracovním procesu) a průběžně hlásí jeho stav.
+
+    Args:
+        distance_matrix (DistanceMatrix): Matice vzdáleností řešené instance.
+        solver_kwargs (dict): Parametry pro TSPGeneticSolver (kromě distance_matrix).
+        progress_queue (optional): Fronta, do které se posílají n-tice (generace, vzdálenost, cesta nebo None).
+        stop_event (optional): Událost pro zrušení výpočtu (např. multiprocessing.Manager().Event()).
+        min_interval (float): Minimální odstup zpráv o průběhu v sekundách.
+        seed (int, optional): Seed pro random i np.random, aby byl výsledek reprodukovatelný.
+
+    Returns:
+        tuple: (nejlepší cesta, její délka) - při zrušení dosud nejlepší nalezená.
+    """
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    progress_callback = ThrottledProgress(progress_queue, min_interval) if progress_queue is not None else None
+    solver = TSPGeneticSolver(distance_matrix, progress_callback=progress_callback, stop_event=stop_event,
+                              **solver_kwargs)
+    return solver.solve()
@@ -0,0 +1,220 @@
+import numpy as np
+
+
+class SparseGraph:
+    """
+    Řídký graf měst uložený ve formátu CSR (compressed sparse row): pro město i jsou jeho
+    povolené hrany v indices[indptr[i]:indptr[i + 1]] (seřazené podle cílového města)
+    a jejich délky ve weights. Paměť roste s počtem hran, ne s n².
+
+    Má stejné rozhraní jako DistanceMatrix (number_of_cities, get_distance, get_distances, ...),
+    takže ho TSPGeneticSolver používá přímo. Chybějící hrana má délku 'missing_edge_penalty',
+    takže cesty přes nespojená města jsou vždy horší než libovolná přípustná cesta.
+    """
+
+    def __init__(self, number_of_cities, indptr, indices, weights, coordinates=None, missing_edge_penalty=None):
+        """
+        Args:
+            number_of_cities (int): Počet měst.
+            indptr (np.ndarray): Pole (n_cities + 1,) s počátky řádků CSR.
+            indices (np.ndarray): Cílová města hran, v rámci řádku vzestupně seřazená a bez duplicit;
+                ke každé hraně musí existovat stejně dlouhá opačná hrana.
+            weights (np.ndarray): Délky hran (stejný tvar jako indices).
+            coordinates (np.ndarray, optional): Souřadnice měst (n_cities, 2) pro vykreslení a heuristiky.
+            missing_edge_penalty (float, optional): Délka chybějící hrany. Výchozí je
+                (n_cities + 1) * nejdelší hrana, tedy víc než jakákoli cesta jen po existujících hranách.
+        """
+        if number_of_cities < 2:
+            raise ValueError("Počet měst musí být alespoň 2.")
+        self.number_of_cities = int(number_of_cities)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.intp)
+        self.weights = np.asarray(weights)
+        if self.indptr.shape != (self.number_of_cities + 1,) or self.indices.shape != self.weights.shape:
+            raise ValueError("Pole CSR (indptr, indices, weights) mají nekonzistentní tvary.")
+        if self.indices.size and (self.indices.min() < 0 or self.indices.max() >= self.number_of_cities):
+            raise ValueError("Index města v hraně je mimo rozsah.")
+
+        self.coordinates = None if coordinates is None else np.asarray(coordinates, dtype=np.float64)
+        self.coord_range_max = int(np.ceil(self.coordinates.max())) if self.coordinates is not None else 0
+        self.dtype = self.weights.dtype
+        # Kompatibilita s DistanceMatrix: plná matice neexistuje, vzdálenosti se nezaokrouhlují
+        self.distances = None
+        self.store_matrix = False
+        self.rounding = None
+        if missing_edge_penalty is None:
+            longest = float(self.weights.max()) if self.weights.size else 1.0
+            missing_edge_penalty = (self.number_of_cities + 1) * longest
+        self.missing_edge_penalty = float(missing_edge_penalty)
+
+        # Klíče hran (zdroj * n + cíl) jsou díky řazení CSR globálně seřazené - dotaz je jeden searchsorted
+        rows = np.repeat(np.arange(self.number_of_cities, dtype=np.int64), np.diff(self.indptr))
+        self._keys = rows * self.number_of_cities + self.indices
+        if np.any(np.diff(self._keys) <= 0):
+            raise ValueError("Hrany v řádcích CSR musí být vzestupně seřazené a bez duplicit.")
+        # Řešič (cache délek, inverze, 2-opt, EAX) předpokládá symetrické vzdálenosti
+        reverse_keys = self.indices.astype(np.int64) * self.number_of_cities + rows
+        reverse_order = np.argsort(reverse_keys, kind="stable")
+        if (not np.array_equal(reverse_keys[reverse_order], self._keys)
+                or not np.array_equal(self.weights[reverse_order], self.weights)):
+            raise ValueError("Graf musí být symetrický: každá hrana musí mít stejně dlouhou opačnou hranu.")
+
+    @classmethod
+    def from_edges(cls, number_of_cities, sources, targets, weights, coordinates=None, missing_edge_penalty=None):
+        """
+        Vytvoří graf ze seznamu hran. Hrany jsou neorientované (platí v obou směrech), protože
+        řešič předpokládá symetrické vzdálenosti. Duplicitní hrany se sloučí (ponechá se kratší).
+
+        Args:
+            number_of_cities (int): Počet měst.
+            sources, targets (array-like): Koncová města hran.
+            weights (array-like): Délky hran.
+            coordinates (np.ndarray, optional): Souřadnice měst.
+            missing_edge_penalty (float, optional): Délka chybějící hrany (viz __init__).
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        weights = np.asarray(weights)
+        if not sources.shape == targets.shape == weights.shape:
+            raise ValueError("Pole hran (sources, targets, weights) musí mít stejný tvar.")
+        sources, targets = np.concatenate([sources, targets]), np.concatenate([targets, sources])
+        weights = np.concatenate([weights, weights])
+        keep = sources != targets  # Smyčky do téhož města nemají pro cestu smysl
+        sources, targets, weights = sources[keep], targets[keep], weights[keep]
+
+        # Seřazení podle (zdroj, cíl, délka) - první z duplicit je nejkratší
+        order = np.lexsort((weights, targets, sources))
+        sources, targets, weights = sources[order], targets[order], weights[order]
+        first = np.ones(len(sources), dtype=bool)
+        first[1:] = (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+        sources, targets, weights = sources[first], targets[first], weights[first]
+
+        indptr = np.zeros(number_of_cities + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=number_of_cities), out=indptr[1:])
+        return cls(number_of_cities, indptr, targets, weights, coordinates, missing_edge_penalty)
+
+    @classmethod
+    def from_coordinates(cls, coordinates, k=8, missing_edge_penalty=None):
+        """
+        Vytvoří řídký Euklidovský graf, ve kterém je každé město spojené se svými k nejbližšími sousedy.
+
+        Args:
+            coordinates (np.ndarray): Souřadnice měst (n_cities, 2).
+            k (int): Počet nejbližších sousedů na město.
+        """
+        # Import až zde: local_search importuje tento modul
+        from graph_generator import DistanceMatrix
+        from local_search import nearest_neighbor_lists
+
+        coordinates = np.asarray(coordinates, dtype=np.float64)
+        points = DistanceMatrix.from_arrays(coordinates)
+        neighbors = nearest_neighbor_lists(points, k)
+        sources = np.repeat(np.arange(len(coordinates)), neighbors.shape[1])
+        targets = neighbors.ravel()
+        return cls.from_edges(len(coordinates), sources, targets, points.get_distances(sources, targets),
+                              coordinates=coordinates, missing_edge_penalty=missing_edge_penalty)
+
+    @property
+    def n_edges(self):
+        """Počet uložených (orientovaných) hran."""
+        return len(self.indices)
+
+    def neighbors(self, city):
+        """Vrátí města, do kterých z města 'city' vede hrana."""
+        return self.indices[self.indptr[city]:self.indptr[city + 1]]
+
+    def neighbor_lists(self, k=None):
+        """
+        Pro každé město vrátí seznam jeho sousedů seřazený podle délky hrany (nejvýše k).
+        Seznamy mají různou délku podle stupně města.
+        """
+        lists = []
+        for city in range(self.number_of_cities):
+            start, end = self.indptr[city], self.indptr[city + 1]
+            order = np.argsort(self.weights[start:end], kind="stable")[:k]
+            lists.append(self.indices[start:end][order].tolist())
+        return lists
+
+    def has_edges(self, from_cities, to_cities):
+        """Vrátí pole bool, zda mezi dvojicemi měst existuje hrana."""
+        return self._lookup(from_cities, to_cities)[1]
+
+    def _lookup(self, from_cities, to_cities):
+        """Najde pozice hran v CSR polích; vrací (pozice, nalezeno)."""
+        from_cities = np.asarray(from_cities, dtype=np.int64)
+        to_cities = np.asarray(to_cities, dtype=np.int64)
+        keys = from_cities * self.number_of_cities + to_cities
+        if not len(self._keys):
+            return np.zeros(keys.shape, dtype=np.intp), np.zeros(keys.shape, dtype=bool)
+        positions = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+        return positions, self._keys[positions] == keys
+
+    def get_distance(self, city1, city2):
+        """Vrátí délku hrany mezi city1 a city2 (nebo missing_edge_penalty, pokud hrana neexistuje)."""
+        return self.get_distances(int(city1), int(city2))[()]
+
+    def get_distances(self, from_cities, to_cities):
+        """
+        Vrátí délky hran pro celá pole dvojic měst najednou (prvek po prvku);
+        chybějící hrany mají délku missing_edge_penalty.
+        """
+        positions, found = self._lookup(from_cities, to_cities)
+        if not len(self.weights):
+            return np.full(positions.shape, self.missing_edge_penalty)
+        return np.where(found, self.weights[positions], self.missing_edge_penalty)
+
+    def count_missing_edges(self, route):
+        """Vrátí počet hran cesty (včetně návratu do startu), které v grafu neexistují."""
+        route = np.asarray(route, dtype=np.intp)
+        return int((~self.has_edges(route, np.roll(route, -1))).sum())
+
+    def random_walk_route(self):
+        """
+        Náhodná cesta vedoucí co nejvíc po existujících hranách: z aktuálního města jde
+        do náhodného nenavštíveného souseda, ve slepé uličce skočí do náhodného nenavštíveného města.
+        """
+        n = self.number_of_cities
+        unvisited = np.random.permutation(n).tolist()
+        position = {city: idx for idx, city in enumerate(unvisited)}
+        route = np.empty(n, dtype=np.intp)
+
+        def take(city):
+            # Odebrání ze seznamu nenavštívených v O(1): na místo města se přesune poslední prvek
+            idx = position.pop(city)
+            last = unvisited.pop()
+            if last != city:
+                unvisited[idx] = last
+                position[last] = idx
+
+        city = unvisited[-1]
+        take(city)
+        route[0] = city
+        indptr, indices = self.indptr, self.indices
+        for step in range(1, n):
+            start, end = indptr[city], indptr[city + 1]
+            candidates = [other for other in indices[start:end].tolist() if other in position]
+            if candidates:
+                city = candidates[np.random.randint(len(candidates))]
+            else:
+                city = unvisited[np.random.randint(len(unvisited))]
+            take(city)
+            route[step] = city
+        return route
+
+    def get_coordinates(self):
+        """Vrátí pole se souřadnicemi měst (nebo None)."""
+        return self.coordinates
+
+    def print_matrix(self):
+        """Vytiskne souhrn grafu (plná matice se neukládá)."""
+        print(f"Řídký graf: {self.number_of_cities} měst, {self.n_edges} hran "
+              f"(penalizace chybějící hrany {self.missing_edge_penalty:.2f}).")
+
+    def print_coordinates(self):
+        """Vytiskne souřadnice měst."""
+        print("\nSouřadnice měst:")
+        if self.coordinates is None:
+            print("(instance nemá souřadnice)")
+            return
+        for i, coord in enumerate(self.coordinates):
+            print(f"Město {i}: ({coord[0]:.0f}, {coord[1]:.0f})")